@@ -10,13 +10,75 @@ def _to_bool(value: str | None, default: bool = False) -> bool:
     return value.strip().lower() in {"1", "true", "yes", "on"}
 
 
+def _to_int(value: str | None, default: int) -> int:
+    if value is None or not value.strip():
+        return default
+    try:
+        return int(value.strip())
+    except ValueError:
+        return default
+
+
+def _to_float(value: str | None, default: float) -> float:
+    if value is None or not value.strip():
+        return default
+    try:
+        return float(value.strip())
+    except ValueError:
+        return default
+
+
+def _to_csv(value: str | None, default: str) -> tuple[str, ...]:
+    raw = default if value is None else value
+    return tuple(part.strip().lower() for part in raw.split(",") if part.strip())
+
+
+def _to_int_tuple(value: str | None, default: str) -> tuple[int, ...]:
+    widths: set[int] = set()
+    for part in _to_csv(value, default):
+        number = _to_int(part, 0)
+        if number > 0:
+            widths.add(number)
+    return tuple(sorted(widths))
+
+
 @dataclass(frozen=True)
 class Settings:
     database_url: str
     database_ssl: bool
+    database_pool_min_size: int
+    database_pool_max_size: int
+    database_pool_max_idle: float
+    database_pool_timeout: float
+    cms_cache_ttl_seconds: float
+    cms_cache_max_entries: int
+    cms_cache_control: str
+    cms_live_cache_control: str
+    schema_cache_ttl_seconds: float
+    auth_cache_ttl_seconds: float
+    auth_cache_max_entries: int
+    llm_http2: bool
+    llm_http_timeout: float
+    llm_http_connect_timeout: float
+    llm_http_max_connections: int
+    llm_http_max_keepalive: int
+    llm_http_keepalive_expiry: float
+    chat_cache_ttl_seconds: float
+    chat_cache_max_entries: int
+    chat_cache_with_history: bool
+    chat_system_prompt_path: str
+    chat_max_prompt_tokens: int
     storage_bucket: str
     media_root: str
     media_base_url: str
+    max_upload_bytes: int
+    media_deduplicate: bool
+    media_variant_widths: tuple[int, ...]
+    media_variant_formats: tuple[str, ...]
+    media_variant_quality: int
+    media_variant_workers: int
+    media_cache_control: str
+    media_accel_redirect_prefix: str
     webhook_secret: str
     smtp_host: str
     smtp_port: int
@@ -26,6 +88,16 @@ class Settings:
     smtp_use_ssl: bool
     smtp_from_email: str
     smtp_from_name: str
+    smtp_timeout: float
+    smtp_pool_max_connections: int
+    smtp_pool_max_idle_seconds: float
+    email_outbox_enabled: bool
+    email_outbox_batch_size: int
+    email_outbox_poll_seconds: float
+    email_outbox_max_attempts: int
+    email_outbox_retry_seconds: float
+    metrics_enabled: bool
+    metrics_token: str
     admin_notification_email: str
     company_name: str
     site_base_url: str
@@ -69,6 +141,28 @@ class Settings:
         return cls(
             database_url=(os.getenv("DATABASE_URL") or "").strip(),
             database_ssl=_to_bool(os.getenv("DATABASE_SSL"), default=False),
+            database_pool_min_size=max(0, _to_int(os.getenv("DATABASE_POOL_MIN_SIZE"), 1)),
+            database_pool_max_size=max(1, _to_int(os.getenv("DATABASE_POOL_MAX_SIZE"), 10)),
+            database_pool_max_idle=_to_float(os.getenv("DATABASE_POOL_MAX_IDLE"), 300.0),
+            database_pool_timeout=_to_float(os.getenv("DATABASE_POOL_TIMEOUT"), 10.0),
+            cms_cache_ttl_seconds=_to_float(os.getenv("CMS_CACHE_TTL_SECONDS"), 60.0),
+            cms_cache_max_entries=_to_int(os.getenv("CMS_CACHE_MAX_ENTRIES"), 512),
+            cms_cache_control=(os.getenv("CMS_CACHE_CONTROL") or "no-cache").strip(),
+            cms_live_cache_control=(os.getenv("CMS_LIVE_CACHE_CONTROL") or "").strip(),
+            schema_cache_ttl_seconds=max(0.0, _to_float(os.getenv("SCHEMA_CACHE_TTL_SECONDS"), 300.0)),
+            auth_cache_ttl_seconds=max(0.0, _to_float(os.getenv("AUTH_CACHE_TTL_SECONDS"), 300.0)),
+            auth_cache_max_entries=max(0, _to_int(os.getenv("AUTH_CACHE_MAX_ENTRIES"), 1024)),
+            llm_http2=_to_bool(os.getenv("LLM_HTTP2"), default=True),
+            llm_http_timeout=_to_float(os.getenv("LLM_HTTP_TIMEOUT"), 30.0),
+            llm_http_connect_timeout=_to_float(os.getenv("LLM_HTTP_CONNECT_TIMEOUT"), 5.0),
+            llm_http_max_connections=max(1, _to_int(os.getenv("LLM_HTTP_MAX_CONNECTIONS"), 20)),
+            llm_http_max_keepalive=max(0, _to_int(os.getenv("LLM_HTTP_MAX_KEEPALIVE"), 10)),
+            llm_http_keepalive_expiry=_to_float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY"), 60.0),
+            chat_cache_ttl_seconds=_to_float(os.getenv("CHAT_CACHE_TTL_SECONDS"), 3600.0),
+            chat_cache_max_entries=_to_int(os.getenv("CHAT_CACHE_MAX_ENTRIES"), 1024),
+            chat_cache_with_history=_to_bool(os.getenv("CHAT_CACHE_WITH_HISTORY"), default=False),
+            chat_system_prompt_path=(os.getenv("CHAT_SYSTEM_PROMPT_PATH") or "").strip(),
+            chat_max_prompt_tokens=_to_int(os.getenv("CHAT_MAX_PROMPT_TOKENS"), 6000),
             storage_bucket=(
                 os.getenv("STORAGE_BUCKET")
                 or os.getenv("SUPABASE_STORAGE_BUCKET")
@@ -76,6 +170,14 @@ class Settings:
             ).strip(),
             media_root=media_root,
             media_base_url=media_base_url,
+            max_upload_bytes=max(0, _to_int(os.getenv("MAX_UPLOAD_BYTES"), 250 * 1024 * 1024)),
+            media_deduplicate=_to_bool(os.getenv("MEDIA_DEDUPLICATE"), default=False),
+            media_variant_widths=_to_int_tuple(os.getenv("MEDIA_VARIANT_WIDTHS"), "320,640,1024,1600"),
+            media_variant_formats=_to_csv(os.getenv("MEDIA_VARIANT_FORMATS"), "webp,avif"),
+            media_variant_quality=min(100, max(1, _to_int(os.getenv("MEDIA_VARIANT_QUALITY"), 80))),
+            media_variant_workers=max(1, _to_int(os.getenv("MEDIA_VARIANT_WORKERS"), 2)),
+            media_cache_control=os.getenv("MEDIA_CACHE_CONTROL", "public, max-age=3600").strip(),
+            media_accel_redirect_prefix=os.getenv("MEDIA_ACCEL_REDIRECT_PREFIX", "").strip(),
             webhook_secret=(os.getenv("SUPABASE_AUTH_WEBHOOK_SECRET") or "").strip(),
             smtp_host=(os.getenv("SMTP_HOST") or "").strip(),
             smtp_port=int(os.getenv("SMTP_PORT", "587")),
@@ -89,6 +191,16 @@ class Settings:
                 or ""
             ).strip(),
             smtp_from_name=(os.getenv("SMTP_FROM_NAME") or "DrawnDimension").strip(),
+            smtp_timeout=_to_float(os.getenv("SMTP_TIMEOUT"), 20.0),
+            smtp_pool_max_connections=max(1, _to_int(os.getenv("SMTP_POOL_MAX_CONNECTIONS"), 4)),
+            smtp_pool_max_idle_seconds=max(0.0, _to_float(os.getenv("SMTP_POOL_MAX_IDLE_SECONDS"), 60.0)),
+            email_outbox_enabled=_to_bool(os.getenv("EMAIL_OUTBOX_ENABLED"), default=True),
+            email_outbox_batch_size=max(1, _to_int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE"), 20)),
+            email_outbox_poll_seconds=max(0.1, _to_float(os.getenv("EMAIL_OUTBOX_POLL_SECONDS"), 5.0)),
+            email_outbox_max_attempts=max(1, _to_int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS"), 8)),
+            email_outbox_retry_seconds=max(1.0, _to_float(os.getenv("EMAIL_OUTBOX_RETRY_SECONDS"), 30.0)),
+            metrics_enabled=_to_bool(os.getenv("METRICS_ENABLED"), default=False),
+            metrics_token=(os.getenv("METRICS_TOKEN") or "").strip(),
             admin_notification_email=(
                 os.getenv("ADMIN_NOTIFICATION_EMAIL")
                 or "drawndimensioninfo@gmail.com"
@@ -59,4 +59,5 @@ async def supabase_auth_user_created(request: Request) -> dict[str, Any]:
         "user_welcome_sent": result.user_welcome_sent,
         "admin_notification_sent": result.admin_notification_sent,
         "skipped_as_duplicate": result.skipped_as_duplicate,
+        "queued": result.queued,
     }
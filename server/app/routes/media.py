@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import stat
+from email.utils import formatdate, parsedate_to_datetime
+from hashlib import md5
+from pathlib import Path
+from urllib.parse import quote
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+
+from server.app.config import settings
+from server.app.services.http_cache import etag_matches
+
+router = APIRouter(prefix="/media", tags=["media"])
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Deduplicated blobs and image variants are named after their content hash and never change in place.
+CONTENT_HASHED_PREFIXES = ("blobs/", "variants/")
+
+
+def _resolve_media_file(bucket: str, object_path: str) -> Path:
+    if not bucket or bucket.startswith(".") or "/" in bucket or "\\" in bucket:
+        raise HTTPException(status_code=404, detail="Not found")
+    parts = [part for part in object_path.split("/") if part]
+    # Dotfiles include in-progress ".upload-*.part" and ".variant-*.part" temp files.
+    if not parts or any(part.startswith(".") for part in parts):
+        raise HTTPException(status_code=404, detail="Not found")
+
+    bucket_root = Path(settings.media_root).resolve().joinpath(bucket)
+    target = bucket_root.joinpath(*parts).resolve()
+    if not target.is_relative_to(bucket_root):
+        raise HTTPException(status_code=404, detail="Not found")
+    return target
+
+
+def _stat_file(path: Path) -> os.stat_result | None:
+    try:
+        result = os.stat(path)
+    except OSError:
+        return None
+    return result if stat.S_ISREG(result.st_mode) else None
+
+
+def _file_etag(result: os.stat_result) -> str:
+    # Same validator FileResponse derives on its own, so Range If-Range checks agree with ours.
+    etag_base = f"{result.st_mtime}-{result.st_size}"
+    return f'"{md5(etag_base.encode(), usedforsecurity=False).hexdigest()}"'
+
+
+def _not_modified(request: Request, etag: str, mtime: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        return etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return int(mtime) <= since.timestamp()
+    return False
+
+
+@router.api_route("/{bucket}/{object_path:path}", methods=["GET", "HEAD"])
+async def serve_media(bucket: str, object_path: str, request: Request) -> Response:
+    target = _resolve_media_file(bucket, object_path)
+    result = await asyncio.to_thread(_stat_file, target)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    etag = _file_etag(result)
+    cache_control = (
+        IMMUTABLE_CACHE_CONTROL
+        if object_path.startswith(CONTENT_HASHED_PREFIXES)
+        else settings.media_cache_control
+    )
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(result.st_mtime, usegmt=True),
+        "Accept-Ranges": "bytes",
+    }
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+
+    if _not_modified(request, etag, result.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    if settings.media_accel_redirect_prefix:
+        # Let nginx stream the file with sendfile and handle Range itself.
+        relative = target.relative_to(Path(settings.media_root).resolve()).as_posix()
+        headers["X-Accel-Redirect"] = f"{settings.media_accel_redirect_prefix.rstrip('/')}/{quote(relative)}"
+        return Response(status_code=200, headers=headers)
+
+    return FileResponse(target, stat_result=result, headers=headers)
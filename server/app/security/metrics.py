@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import hmac
+
+from fastapi import HTTPException, Request
+
+LOOPBACK_HOSTS = frozenset({"127.0.0.1", "::1", "localhost"})
+
+
+def verify_metrics_request(request: Request, metrics_token: str) -> None:
+    secret = metrics_token.strip()
+    if secret:
+        auth_header = request.headers.get("authorization", "").strip()
+        if auth_header.lower().startswith("bearer ") and hmac.compare_digest(auth_header[7:].strip(), secret):
+            return
+        raise HTTPException(status_code=401, detail="Invalid metrics authentication")
+
+    # Without a token only local scrapers are served; proxied requests also arrive from loopback.
+    client_host = request.client.host if request.client else ""
+    if client_host in LOOPBACK_HOSTS and "x-forwarded-for" not in request.headers:
+        return
+    raise HTTPException(status_code=403, detail="Metrics are only served to loopback clients without METRICS_TOKEN")
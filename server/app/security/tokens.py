@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import json
+import time
+from dataclasses import dataclass
+from typing import Any
+
+
+def _decode_base64url_json(segment: str) -> dict[str, Any]:
+    padded = segment + "=" * ((4 - len(segment) % 4) % 4)
+    decoded = base64.urlsafe_b64decode(padded.encode("utf-8"))
+    parsed = json.loads(decoded.decode("utf-8"))
+    return parsed if isinstance(parsed, dict) else {}
+
+
+@dataclass(frozen=True)
+class ParsedJWT:
+    """A structurally valid HS256 token whose signature has not been checked yet."""
+
+    signing_input: bytes
+    signature: str
+    payload: dict[str, Any]
+
+    @property
+    def expires_at(self) -> float | None:
+        exp = self.payload.get("exp")
+        if exp is None:
+            return None
+        try:
+            return float(exp)
+        except Exception:
+            # An unreadable exp can never be satisfied.
+            return float("-inf")
+
+    def is_expired(self, now: float | None = None) -> bool:
+        expires_at = self.expires_at
+        return expires_at is not None and expires_at <= (time.time() if now is None else now)
+
+
+def parse_hs256_jwt(token: str) -> ParsedJWT | None:
+    """Split and decode a token once so it can be checked against several keys."""
+    if not token:
+        return None
+
+    parts = token.split(".")
+    if len(parts) != 3:
+        return None
+
+    header_segment, payload_segment, signature_segment = parts
+    try:
+        header = _decode_base64url_json(header_segment)
+        payload = _decode_base64url_json(payload_segment)
+    except Exception:
+        return None
+
+    if str(header.get("alg") or "").upper() != "HS256":
+        return None
+
+    return ParsedJWT(
+        signing_input=f"{header_segment}.{payload_segment}".encode("utf-8"),
+        signature=signature_segment,
+        payload=payload,
+    )
+
+
+class HS256Key:
+    """An HS256 secret whose HMAC key state is prepared once and copied per check."""
+
+    def __init__(self, secret: str):
+        self._mac = hmac.new(secret.encode("utf-8"), digestmod=hashlib.sha256) if secret else None
+
+    def __bool__(self) -> bool:
+        return self._mac is not None
+
+    def sign(self, signing_input: bytes) -> str:
+        if self._mac is None:
+            raise ValueError("HS256 key has no secret")
+        mac = self._mac.copy()
+        mac.update(signing_input)
+        return base64.urlsafe_b64encode(mac.digest()).decode("utf-8").rstrip("=")
+
+    def verify(self, token: ParsedJWT) -> dict[str, Any] | None:
+        """Return the claims when the signature matches and the token has not expired."""
+        if self._mac is None:
+            return None
+        expected = self.sign(token.signing_input).encode("utf-8")
+        if not hmac.compare_digest(expected, token.signature.encode("utf-8")):
+            return None
+        if token.is_expired():
+            return None
+        return token.payload
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from itertools import groupby
+from typing import Any, AsyncIterator, Literal, Sequence
+
+from psycopg import AsyncConnection, AsyncCursor, sql
+from psycopg_pool import AsyncConnectionPool
+
+from server.app.config import settings
+from server.app.services.database import (
+    _connection_kwargs,
+    _require_database_url,
+    build_count_statement,
+    build_delete_statement,
+    build_insert_statement,
+    build_page,
+    build_select_statement,
+    build_status_counts_statement,
+    build_update_statement,
+    group_status_counts,
+)
+from server.app.services.metrics import span
+
+_pool: AsyncConnectionPool | None = None
+_pool_lock: asyncio.Lock | None = None
+
+
+async def _get_pool() -> AsyncConnectionPool:
+    global _pool, _pool_lock
+    if _pool is not None:
+        return _pool
+
+    if _pool_lock is None:
+        _pool_lock = asyncio.Lock()
+    async with _pool_lock:
+        if _pool is None:
+            min_size = settings.database_pool_min_size
+            pool = AsyncConnectionPool(
+                _require_database_url(),
+                kwargs=_connection_kwargs(),
+                min_size=min_size,
+                max_size=max(min_size, settings.database_pool_max_size),
+                max_idle=settings.database_pool_max_idle,
+                timeout=settings.database_pool_timeout,
+                check=AsyncConnectionPool.check_connection,
+                name="cms-async",
+                open=False,
+            )
+            await pool.open()
+            _pool = pool
+        return _pool
+
+
+@asynccontextmanager
+async def _connection() -> AsyncIterator[AsyncConnection[dict[str, Any]]]:
+    with span("db.async"):
+        pool = await _get_pool()
+        async with pool.connection() as conn:
+            yield conn
+
+
+@asynccontextmanager
+async def transaction() -> AsyncIterator[AsyncCursor[dict[str, Any]]]:
+    async with _connection() as conn:
+        async with conn.transaction():
+            async with conn.cursor() as cur:
+                yield cur
+
+
+async def close_pool() -> None:
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        await pool.close()
+
+
+def pool_stats() -> dict[str, Any]:
+    if _pool is None:
+        return {"open": False}
+    return {"open": not _pool.closed, **_pool.get_stats()}
+
+
+async def _fetch_statement(
+    statement: str | sql.Composable,
+    params: Sequence[Any],
+    *,
+    commit: bool,
+) -> list[dict[str, Any]]:
+    async with _connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(statement, params)
+            rows = await cur.fetchall() if cur.description else []
+        if commit:
+            await conn.commit()
+        return [dict(row) for row in rows]
+
+
+async def fetch_all(query: str, params: Sequence[Any] | None = None) -> list[dict[str, Any]]:
+    return await _fetch_statement(query, params or (), commit=False)
+
+
+async def fetch_one(query: str, params: Sequence[Any] | None = None) -> dict[str, Any] | None:
+    async with _connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(query, params or ())
+            row = await cur.fetchone()
+            return dict(row) if row else None
+
+
+async def execute(query: str, params: Sequence[Any] | None = None) -> None:
+    await _fetch_statement(query, params or (), commit=True)
+
+
+async def select_records(
+    table_name: str,
+    *,
+    status: str | None = None,
+    columns: Sequence[str] | None = None,
+    order_by: str = "created_at",
+    descending: bool = True,
+    display_order_first: bool = False,
+    limit: int | None = None,
+    after: str | None = None,
+) -> list[dict[str, Any]]:
+    statement, params = build_select_statement(
+        table_name,
+        status=status,
+        columns=columns,
+        order_by=order_by,
+        descending=descending,
+        display_order_first=display_order_first,
+        limit=limit,
+        after=after,
+    )
+    return await _fetch_statement(statement, params, commit=False)
+
+
+async def select_page(
+    table_name: str,
+    *,
+    limit: int,
+    status: str | None = None,
+    columns: Sequence[str] | None = None,
+    after: str | None = None,
+) -> dict[str, Any]:
+    rows = await select_records(
+        table_name,
+        status=status,
+        columns=columns,
+        limit=limit,
+        after=after,
+    )
+    return build_page(rows, limit)
+
+
+async def count_records(table_name: str, *, status: str | None = None) -> int:
+    statement, params = build_count_statement(table_name, status=status)
+    rows = await _fetch_statement(statement, params, commit=False)
+    return int((rows[0] if rows else {}).get("total") or 0)
+
+
+async def count_records_by_status(table_names: Sequence[str]) -> dict[str, dict[str, int]]:
+    rows = await _fetch_statement(build_status_counts_statement(table_names), [], commit=False)
+    return group_status_counts(table_names, rows)
+
+
+async def insert_record(table_name: str, data: dict[str, Any]) -> list[dict[str, Any]]:
+    statement, values = build_insert_statement(table_name, data)
+    return await _fetch_statement(statement, values, commit=True)
+
+
+async def update_record_by_id(table_name: str, record_id: str, data: dict[str, Any]) -> list[dict[str, Any]]:
+    built = build_update_statement(table_name, record_id, data)
+    if built is None:
+        return []
+    statement, values = built
+    return await _fetch_statement(statement, values, commit=True)
+
+
+async def delete_record_by_id(table_name: str, record_id: str) -> list[dict[str, Any]]:
+    statement, values = build_delete_statement(table_name, record_id)
+    return await _fetch_statement(statement, values, commit=True)
+
+
+@dataclass(frozen=True)
+class RecordWrite:
+    op: Literal["insert", "update", "delete"]
+    table_name: str
+    record_id: str | None = None
+    data: dict[str, Any] = field(default_factory=dict)
+
+    def shape(self) -> tuple[Any, ...]:
+        return (self.op, self.table_name, tuple(self.data))
+
+
+def _build_write(write: RecordWrite) -> tuple[sql.Composed, list[Any]] | None:
+    if write.op == "insert":
+        return build_insert_statement(write.table_name, write.data)
+    if write.op == "update":
+        return build_update_statement(write.table_name, str(write.record_id), write.data)
+    return build_delete_statement(write.table_name, str(write.record_id))
+
+
+async def apply_writes(writes: Sequence[RecordWrite]) -> list[list[dict[str, Any]]]:
+    """Apply writes in order in one transaction; each run of same-shaped writes is one executemany."""
+    results: list[list[dict[str, Any]]] = [[] for _ in writes]
+    built = [
+        (index, write, statement)
+        for index, write in enumerate(writes)
+        if (statement := _build_write(write)) is not None
+    ]
+
+    async with transaction() as cur:
+        for _, run in groupby(built, key=lambda entry: entry[1].shape()):
+            run = list(run)
+            query = run[0][2][0]
+            await cur.executemany(query, [statement[1] for _, _, statement in run], returning=True)
+            for index, _, _ in run:
+                results[index] = [dict(row) for row in await cur.fetchall()]
+                cur.nextset()
+    return results
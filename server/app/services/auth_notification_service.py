@@ -1,21 +1,22 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import uuid
 from dataclasses import dataclass
+from typing import Sequence
 
 from server.app.config import Settings
 from server.app.models.auth_events import AuthUserCreatedEvent
-from server.app.services.database import (
-    ensure_auth_event_notifications_table,
-    execute,
-    fetch_one,
-    is_database_configured,
-)
+from server.app.services import async_database
+from server.app.services.database import ensure_auth_event_notifications_table, is_database_configured
 from server.app.services.email.client import SMTPEmailClient
+from server.app.services.email.outbox import OutboundEmail, enqueue_emails, outbox_enabled
 from server.app.services.email.templates import (
-    build_admin_notification_html,
-    build_welcome_email_html,
+    admin_notification_template,
+    render_admin_notification,
+    render_welcome_email,
+    welcome_email_template,
 )
 
 logger = logging.getLogger(__name__)
@@ -23,12 +24,29 @@ logger = logging.getLogger(__name__)
 WELCOME_EVENT_TYPE = "welcome_email_sent_v1"
 ADMIN_EVENT_TYPE = "admin_notification_sent_v1"
 
+# The webhook route builds a service per request, so the table check is tracked per process.
+_table_ready = False
+_table_lock: asyncio.Lock | None = None
+
+
+async def _ensure_table() -> None:
+    global _table_ready, _table_lock
+    if _table_ready:
+        return
+    if _table_lock is None:
+        _table_lock = asyncio.Lock()
+    async with _table_lock:
+        if not _table_ready:
+            await asyncio.to_thread(ensure_auth_event_notifications_table)
+            _table_ready = True
+
 
 @dataclass(frozen=True)
 class NotificationDispatchResult:
     user_welcome_sent: bool
     admin_notification_sent: bool
     skipped_as_duplicate: bool
+    queued: bool = False
 
 
 class AuthNotificationService:
@@ -37,39 +55,43 @@ class AuthNotificationService:
         self.email_client = SMTPEmailClient(settings)
         if not is_database_configured():
             raise RuntimeError("DATABASE_URL is required for auth notification tracking")
-        ensure_auth_event_notifications_table()
+        # Compile both templates up front so the branding values are escaped once, not per send.
+        welcome_email_template(settings.company_name, settings.brand_logo_url)
+        admin_notification_template(settings.company_name, settings.brand_logo_url)
 
-    def _event_already_recorded(self, *, user_id: str, event_type: str) -> bool:
+    async def _recorded_event_types(self, *, user_id: str, event_types: Sequence[str]) -> set[str]:
         try:
-            row = fetch_one(
+            rows = await async_database.fetch_all(
                 """
-                select id
+                select event_type
                 from public.auth_event_notifications
-                where user_id = %s and event_type = %s
-                limit 1
+                where user_id = %s and event_type = any(%s)
                 """,
-                (user_id, event_type),
+                (user_id, list(event_types)),
             )
-            return bool(row)
         except Exception as exc:
             raise RuntimeError(
                 "Failed to read auth_event_notifications. Ensure migration is applied."
             ) from exc
-
-    def _record_event(self, *, user_id: str, event_type: str) -> None:
+        return {row["event_type"] for row in rows}
+
+    async def _record_events(self, *, user_id: str, event_types: Sequence[str]) -> None:
+        if not event_types:
+            return
+        values = ", ".join(["(%s, %s, %s)"] * len(event_types))
+        params: list[str] = []
+        for event_type in event_types:
+            params.extend((str(uuid.uuid4()), user_id, event_type))
         try:
-            execute(
-                """
+            await async_database.execute(
+                f"""
                 insert into public.auth_event_notifications (id, user_id, event_type)
-                values (%s, %s, %s)
+                values {values}
                 on conflict (user_id, event_type) do nothing
                 """,
-                (str(uuid.uuid4()), user_id, event_type),
+                params,
             )
         except Exception as exc:
-            message = str(exc).lower()
-            if "duplicate" in message or "unique" in message:
-                return
             raise RuntimeError("Failed to record auth notification event") from exc
 
     async def dispatch_new_user_emails(
@@ -88,36 +110,38 @@ class AuthNotificationService:
         dashboard_url = f"{base_url}/dashboard" if base_url else ""
         user_name = event.full_name or event.email.split("@")[0]
 
-        welcome_already_sent = self._event_already_recorded(
+        await _ensure_table()
+        recorded = await self._recorded_event_types(
             user_id=event.user_id,
-            event_type=WELCOME_EVENT_TYPE,
+            event_types=(WELCOME_EVENT_TYPE, ADMIN_EVENT_TYPE),
         )
-        admin_already_sent = self._event_already_recorded(
-            user_id=event.user_id,
-            event_type=ADMIN_EVENT_TYPE,
-        )
-
-        user_welcome_sent = False
-        admin_notification_sent = False
+        welcome_already_sent = WELCOME_EVENT_TYPE in recorded
+        admin_already_sent = ADMIN_EVENT_TYPE in recorded
 
+        pending: list[tuple[str, OutboundEmail]] = []
         if not welcome_already_sent:
-            welcome_html = build_welcome_email_html(
+            welcome = render_welcome_email(
                 company_name=self.settings.company_name,
                 user_name=user_name,
                 user_email=event.email,
                 dashboard_url=dashboard_url,
                 logo_url=self.settings.brand_logo_url,
             )
-            await self.email_client.send_html_email(
-                to_email=event.email,
-                subject=f"Welcome to {self.settings.company_name}",
-                html_body=welcome_html,
+            pending.append(
+                (
+                    WELCOME_EVENT_TYPE,
+                    self.email_client.build_html_email(
+                        to_email=event.email,
+                        subject=f"Welcome to {self.settings.company_name}",
+                        html_body=welcome.html,
+                        text_body=welcome.text,
+                        dedupe_key=f"{WELCOME_EVENT_TYPE}:{event.user_id}",
+                    ),
+                )
             )
-            self._record_event(user_id=event.user_id, event_type=WELCOME_EVENT_TYPE)
-            user_welcome_sent = True
 
         if not admin_already_sent:
-            admin_html = build_admin_notification_html(
+            admin = render_admin_notification(
                 company_name=self.settings.company_name,
                 logo_url=self.settings.brand_logo_url,
                 user_name=user_name,
@@ -125,13 +149,44 @@ class AuthNotificationService:
                 provider=event.provider,
                 registered_at=event.registered_at,
             )
-            await self.email_client.send_html_email(
-                to_email=self.settings.admin_notification_email,
-                subject="New User Registered",
-                html_body=admin_html,
+            pending.append(
+                (
+                    ADMIN_EVENT_TYPE,
+                    self.email_client.build_html_email(
+                        to_email=self.settings.admin_notification_email,
+                        subject="New User Registered",
+                        html_body=admin.html,
+                        text_body=admin.text,
+                        dedupe_key=f"{ADMIN_EVENT_TYPE}:{event.user_id}",
+                    ),
+                )
+            )
+
+        queued = outbox_enabled()
+        if queued:
+            # The outbox row is durable, so the event counts as handled once it is queued.
+            await enqueue_emails([email for _, email in pending])
+            handled = [event_type for event_type, _ in pending]
+        else:
+            outcomes = await asyncio.gather(
+                *(self.email_client.send_email(email) for _, email in pending),
+                return_exceptions=True,
             )
-            self._record_event(user_id=event.user_id, event_type=ADMIN_EVENT_TYPE)
-            admin_notification_sent = True
+            handled = [
+                event_type
+                for (event_type, _), outcome in zip(pending, outcomes)
+                if not isinstance(outcome, BaseException)
+            ]
+
+        # Record whatever went out before surfacing a failure, so a webhook retry does not resend it.
+        await self._record_events(user_id=event.user_id, event_types=handled)
+        if not queued:
+            for outcome in outcomes:
+                if isinstance(outcome, BaseException):
+                    raise outcome
+
+        user_welcome_sent = WELCOME_EVENT_TYPE in handled
+        admin_notification_sent = ADMIN_EVENT_TYPE in handled
 
         skipped = welcome_already_sent and admin_already_sent
         if skipped:
@@ -141,4 +196,5 @@ class AuthNotificationService:
             user_welcome_sent=user_welcome_sent,
             admin_notification_sent=admin_notification_sent,
             skipped_as_duplicate=skipped,
+            queued=queued and bool(pending),
         )
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+_MISSING = object()
+
+
+class TTLCache:
+    """LRU cache with a fixed TTL; keys are tuples led by a namespace such as a table name."""
+
+    def __init__(self, *, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[Hashable, ...], tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so a load that started before a write cannot store its result.
+        self._generations: dict[Hashable, int] = {}
+        self._clears = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, key: tuple[Hashable, ...], default: Any = None) -> Any:
+        if not self.enabled:
+            return default
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING or entry[0] <= now:
+                if entry is not _MISSING:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def generation(self, namespace: Hashable) -> int:
+        """Read before loading and pass to set(); both counters only grow, so any invalidation or clear changes it."""
+        with self._lock:
+            return self._clears + self._generations.get(namespace, 0)
+
+    def set(
+        self,
+        key: tuple[Hashable, ...],
+        value: Any,
+        *,
+        ttl_seconds: float | None = None,
+        generation: int | None = None,
+    ) -> None:
+        """Store a value; ttl_seconds can only shorten the TTL, and a stale generation drops the value."""
+        if not self.enabled:
+            return
+        ttl = self.ttl_seconds if ttl_seconds is None else min(self.ttl_seconds, ttl_seconds)
+        if ttl <= 0:
+            return
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            if generation is not None and generation != self._clears + self._generations.get(key[0], 0):
+                return
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *namespaces: Hashable) -> None:
+        with self._lock:
+            stale = [key for key in self._entries if key and key[0] in namespaces]
+            for key in stale:
+                del self._entries[key]
+            for namespace in namespaces:
+                self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._clears += 1
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
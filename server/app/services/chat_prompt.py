@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from typing import Sequence
+
+logger = logging.getLogger(__name__)
+
+# Roughly four characters per token for English text with the Llama tokenizer.
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def estimate_message_tokens(message: dict[str, str]) -> int:
+    return estimate_tokens(message.get("content") or "") + MESSAGE_OVERHEAD_TOKENS
+
+
+def estimate_messages_tokens(messages: Sequence[dict[str, str]]) -> int:
+    return sum(estimate_message_tokens(message) for message in messages)
+
+
+def trim_history_to_budget(
+    *,
+    fixed_messages: Sequence[dict[str, str]],
+    history: Sequence[dict[str, str]],
+    max_tokens: int,
+) -> list[dict[str, str]]:
+    """Drop the oldest history turns until the whole prompt fits in ``max_tokens``."""
+    if max_tokens <= 0:
+        return list(history)
+
+    remaining = max_tokens - estimate_messages_tokens(fixed_messages)
+    kept: list[dict[str, str]] = []
+    for message in reversed(history):
+        cost = estimate_message_tokens(message)
+        if cost > remaining:
+            break
+        kept.append(message)
+        remaining -= cost
+    kept.reverse()
+    return kept
+
+
+class PromptSource:
+    """Prompt text built once at import, optionally overridden by a file reloaded on change."""
+
+    def __init__(self, default_text: str, path: str = ""):
+        self._default_text = default_text
+        self._path = path.strip()
+        self._lock = threading.Lock()
+        self._mtime: float | None = None
+        self._text = default_text
+
+    def get(self) -> str:
+        if not self._path:
+            return self._default_text
+        try:
+            mtime = os.stat(self._path).st_mtime
+        except OSError:
+            return self._default_text
+
+        if mtime != self._mtime:
+            with self._lock:
+                if mtime != self._mtime:
+                    try:
+                        with open(self._path, encoding="utf-8") as handle:
+                            text = handle.read().strip()
+                    except OSError:
+                        logger.exception("Failed to read chat prompt from %s", self._path)
+                        return self._text
+                    self._text = text or self._default_text
+                    self._mtime = mtime
+        return self._text
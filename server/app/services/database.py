@@ -1,16 +1,25 @@
 from __future__ import annotations
 
+import base64
+import json
 import re
-from functools import lru_cache
-from typing import Any, Iterable, Sequence
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Any, Iterable, Iterator, Sequence
 
-from psycopg import connect, sql
+from psycopg import Connection, Cursor, sql
 from psycopg.rows import dict_row
+from psycopg_pool import ConnectionPool
 
 from server.app.config import settings
+from server.app.services.metrics import span
 
 _SAFE_IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
 
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+
 
 def is_database_configured() -> bool:
     return bool(settings.database_url.strip())
@@ -30,6 +39,56 @@ def _connection_kwargs() -> dict[str, Any]:
     return kwargs
 
 
+def _get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is not None:
+        return _pool
+
+    with _pool_lock:
+        if _pool is None:
+            min_size = settings.database_pool_min_size
+            _pool = ConnectionPool(
+                _require_database_url(),
+                kwargs=_connection_kwargs(),
+                min_size=min_size,
+                max_size=max(min_size, settings.database_pool_max_size),
+                max_idle=settings.database_pool_max_idle,
+                timeout=settings.database_pool_timeout,
+                check=ConnectionPool.check_connection,
+                name="cms",
+                open=True,
+            )
+        return _pool
+
+
+@contextmanager
+def _connection() -> Iterator[Connection[dict[str, Any]]]:
+    with span("db.sync"), _get_pool().connection() as conn:
+        yield conn
+
+
+@contextmanager
+def transaction() -> Iterator[Cursor[dict[str, Any]]]:
+    with _connection() as conn:
+        with conn.transaction():
+            with conn.cursor() as cur:
+                yield cur
+
+
+def close_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+
+
+def pool_stats() -> dict[str, Any]:
+    if _pool is None:
+        return {"open": False}
+    return {"open": not _pool.closed, **_pool.get_stats()}
+
+
 def _table_identifier(table_name: str):
     safe_table = table_name.strip()
     if not _SAFE_IDENTIFIER_RE.fullmatch(safe_table):
@@ -38,7 +97,7 @@ def _table_identifier(table_name: str):
 
 
 def fetch_all(query: str, params: Sequence[Any] | None = None) -> list[dict[str, Any]]:
-    with connect(_require_database_url(), **_connection_kwargs()) as conn:
+    with _connection() as conn:
         with conn.cursor() as cur:
             cur.execute(query, params or ())
             rows = cur.fetchall()
@@ -46,7 +105,7 @@ def fetch_all(query: str, params: Sequence[Any] | None = None) -> list[dict[str,
 
 
 def fetch_one(query: str, params: Sequence[Any] | None = None) -> dict[str, Any] | None:
-    with connect(_require_database_url(), **_connection_kwargs()) as conn:
+    with _connection() as conn:
         with conn.cursor() as cur:
             cur.execute(query, params or ())
             row = cur.fetchone()
@@ -54,75 +113,129 @@ def fetch_one(query: str, params: Sequence[Any] | None = None) -> dict[str, Any]
 
 
 def execute(query: str, params: Sequence[Any] | None = None) -> None:
-    with connect(_require_database_url(), **_connection_kwargs()) as conn:
+    with _connection() as conn:
         with conn.cursor() as cur:
             cur.execute(query, params or ())
         conn.commit()
 
 
-@lru_cache(maxsize=64)
-def table_exists(table_name: str) -> bool:
-    row = fetch_one(
-        """
-        select exists (
-          select 1
-          from information_schema.tables
-          where table_schema = 'public'
-            and table_name = %s
-        ) as present
-        """,
-        (table_name,),
-    )
-    return bool(row and row.get("present"))
+def encode_cursor(row: dict[str, Any]) -> str:
+    created_at = row.get("created_at")
+    if isinstance(created_at, (datetime, date)):
+        created_at = created_at.isoformat()
+    raw = json.dumps([created_at, str(row.get("id"))], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
 
 
-def clear_table_cache() -> None:
-    table_exists.cache_clear()
+def decode_cursor(cursor: str) -> tuple[str, str]:
+    try:
+        padded = cursor + "=" * ((4 - len(cursor) % 4) % 4)
+        created_at, record_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception as exc:
+        raise ValueError("Invalid pagination cursor") from exc
+    if not isinstance(created_at, str) or not isinstance(record_id, str):
+        raise ValueError("Invalid pagination cursor")
+    return created_at, record_id
 
 
-def select_records(
+def build_select_statement(
     table_name: str,
     *,
     status: str | None = None,
+    columns: Sequence[str] | None = None,
     order_by: str = "created_at",
     descending: bool = True,
-) -> list[dict[str, Any]]:
+    display_order_first: bool = False,
+    limit: int | None = None,
+    after: str | None = None,
+) -> tuple[sql.Composed, list[Any]]:
     if not _SAFE_IDENTIFIER_RE.fullmatch(order_by):
         raise ValueError(f"Unsafe order_by: {order_by}")
 
-    statement = sql.SQL("select * from {}").format(_table_identifier(table_name))
+    paginated = limit is not None or after is not None
+    if paginated and (order_by != "created_at" or display_order_first):
+        raise ValueError("Keyset pagination requires order_by=created_at")
+
+    if columns:
+        selected = list(dict.fromkeys(columns))
+        if paginated:
+            selected.extend(column for column in ("created_at", "id") if column not in selected)
+        if not all(_SAFE_IDENTIFIER_RE.fullmatch(column) for column in selected):
+            raise ValueError("Column list contains unsafe columns")
+        projection: sql.Composable = sql.SQL(", ").join(sql.Identifier(column) for column in selected)
+    else:
+        projection = sql.SQL("*")
+
+    statement = sql.SQL("select {} from {}").format(projection, _table_identifier(table_name))
+    conditions: list[sql.Composable] = []
     params: list[Any] = []
     if status:
-        statement += sql.SQL(" where {} = {}").format(sql.Identifier("status"), sql.Placeholder())
+        conditions.append(sql.SQL("{} = {}").format(sql.Identifier("status"), sql.Placeholder()))
         params.append(status)
-
-    statement += sql.SQL(" order by {} {}").format(
-        sql.Identifier(order_by),
-        sql.SQL("desc" if descending else "asc"),
-    )
-
-    with connect(_require_database_url(), **_connection_kwargs()) as conn:
-        with conn.cursor() as cur:
-            cur.execute(statement, params)
-            rows = cur.fetchall()
-            return [dict(row) for row in rows]
-
-
-def count_records(table_name: str, *, status: str | None = None) -> int:
+    if after:
+        conditions.append(
+            sql.SQL("({}, {}::text) {} ({}::timestamptz, {})").format(
+                sql.Identifier("created_at"),
+                sql.Identifier("id"),
+                sql.SQL("<" if descending else ">"),
+                sql.Placeholder(),
+                sql.Placeholder(),
+            )
+        )
+        params.extend(decode_cursor(after))
+    if conditions:
+        statement += sql.SQL(" where ") + sql.SQL(" and ").join(conditions)
+
+    direction = sql.SQL("desc" if descending else "asc")
+    statement += sql.SQL(" order by ")
+    if display_order_first:
+        # Manual order set through the reorder endpoints; unordered rows follow.
+        statement += sql.SQL("{} asc nulls last, ").format(sql.Identifier("display_order"))
+    statement += sql.SQL("{} {}").format(sql.Identifier(order_by), direction)
+    if paginated:
+        statement += sql.SQL(", {}::text {}").format(sql.Identifier("id"), direction)
+    if limit is not None:
+        # One extra row tells the caller whether another page exists.
+        statement += sql.SQL(" limit {}").format(sql.Literal(int(limit) + 1))
+    return statement, params
+
+
+def build_page(rows: list[dict[str, Any]], limit: int | None) -> dict[str, Any]:
+    if limit is None or len(rows) <= limit:
+        return {"items": rows, "next_cursor": None}
+    items = rows[:limit]
+    return {"items": items, "next_cursor": encode_cursor(items[-1])}
+
+
+def build_count_statement(table_name: str, *, status: str | None = None) -> tuple[sql.Composed, list[Any]]:
     statement = sql.SQL("select count(*) as total from {}").format(_table_identifier(table_name))
     params: list[Any] = []
     if status:
         statement += sql.SQL(" where {} = {}").format(sql.Identifier("status"), sql.Placeholder())
         params.append(status)
+    return statement, params
+
+
+def build_status_counts_statement(table_names: Sequence[str]) -> sql.Composed:
+    if not table_names:
+        raise ValueError("At least one table is required")
+    return sql.SQL(" union all ").join(
+        sql.SQL(
+            "select {} as table_name, coalesce(status::text, 'unknown') as status, count(*) as total "
+            "from {} group by 2"
+        ).format(sql.Literal(table_name), _table_identifier(table_name))
+        for table_name in table_names
+    )
 
-    with connect(_require_database_url(), **_connection_kwargs()) as conn:
-        with conn.cursor() as cur:
-            cur.execute(statement, params)
-            row = cur.fetchone()
-            return int((row or {}).get("total") or 0)
 
+def group_status_counts(table_names: Sequence[str], rows: list[dict[str, Any]]) -> dict[str, dict[str, int]]:
+    counts: dict[str, dict[str, int]] = {table_name: {} for table_name in table_names}
+    for row in rows:
+        counts[row["table_name"]][row["status"]] = int(row["total"] or 0)
+    return counts
 
-def insert_record(table_name: str, data: dict[str, Any]) -> list[dict[str, Any]]:
+
+def build_insert_statement(table_name: str, data: dict[str, Any]) -> tuple[sql.Composed, list[Any]]:
     payload = {key: value for key, value in data.items()}
     if not payload:
         raise ValueError("Insert payload cannot be empty")
@@ -137,19 +250,17 @@ def insert_record(table_name: str, data: dict[str, Any]) -> list[dict[str, Any]]
         sql.SQL(", ").join(sql.Identifier(column) for column in columns),
         sql.SQL(", ").join(sql.Placeholder() for _ in columns),
     )
-
-    with connect(_require_database_url(), **_connection_kwargs()) as conn:
-        with conn.cursor() as cur:
-            cur.execute(statement, values)
-            rows = cur.fetchall()
-        conn.commit()
-        return [dict(row) for row in rows]
+    return statement, values
 
 
-def update_record_by_id(table_name: str, record_id: str, data: dict[str, Any]) -> list[dict[str, Any]]:
+def build_update_statement(
+    table_name: str,
+    record_id: str,
+    data: dict[str, Any],
+) -> tuple[sql.Composed, list[Any]] | None:
     payload = {key: value for key, value in data.items()}
     if not payload:
-        return []
+        return None
 
     columns = [key for key in payload.keys() if _SAFE_IDENTIFIER_RE.fullmatch(key)]
     if len(columns) != len(payload):
@@ -167,29 +278,80 @@ def update_record_by_id(table_name: str, record_id: str, data: dict[str, Any]) -
         sql.SQL(", ").join(assignments),
         sql.Placeholder(),
     )
-
-    with connect(_require_database_url(), **_connection_kwargs()) as conn:
-        with conn.cursor() as cur:
-            cur.execute(statement, values)
-            rows = cur.fetchall()
-        conn.commit()
-        return [dict(row) for row in rows]
+    return statement, values
 
 
-def delete_record_by_id(table_name: str, record_id: str) -> list[dict[str, Any]]:
+def build_delete_statement(table_name: str, record_id: str) -> tuple[sql.Composed, list[Any]]:
     statement = sql.SQL("delete from {} where id = {} returning *").format(
         _table_identifier(table_name),
         sql.Placeholder(),
     )
+    return statement, [record_id]
+
 
-    with connect(_require_database_url(), **_connection_kwargs()) as conn:
+def _fetch_statement(statement: sql.Composed, params: Sequence[Any], *, commit: bool) -> list[dict[str, Any]]:
+    with _connection() as conn:
         with conn.cursor() as cur:
-            cur.execute(statement, (record_id,))
+            cur.execute(statement, params)
             rows = cur.fetchall()
-        conn.commit()
+        if commit:
+            conn.commit()
         return [dict(row) for row in rows]
 
 
+def select_records(
+    table_name: str,
+    *,
+    status: str | None = None,
+    columns: Sequence[str] | None = None,
+    order_by: str = "created_at",
+    descending: bool = True,
+    display_order_first: bool = False,
+    limit: int | None = None,
+    after: str | None = None,
+) -> list[dict[str, Any]]:
+    statement, params = build_select_statement(
+        table_name,
+        status=status,
+        columns=columns,
+        order_by=order_by,
+        descending=descending,
+        display_order_first=display_order_first,
+        limit=limit,
+        after=after,
+    )
+    return _fetch_statement(statement, params, commit=False)
+
+
+def count_records(table_name: str, *, status: str | None = None) -> int:
+    statement, params = build_count_statement(table_name, status=status)
+    rows = _fetch_statement(statement, params, commit=False)
+    return int((rows[0] if rows else {}).get("total") or 0)
+
+
+def count_records_by_status(table_names: Sequence[str]) -> dict[str, dict[str, int]]:
+    rows = _fetch_statement(build_status_counts_statement(table_names), [], commit=False)
+    return group_status_counts(table_names, rows)
+
+
+def insert_record(table_name: str, data: dict[str, Any]) -> list[dict[str, Any]]:
+    statement, values = build_insert_statement(table_name, data)
+    return _fetch_statement(statement, values, commit=True)
+
+
+def update_record_by_id(table_name: str, record_id: str, data: dict[str, Any]) -> list[dict[str, Any]]:
+    built = build_update_statement(table_name, record_id, data)
+    if built is None:
+        return []
+    statement, values = built
+    return _fetch_statement(statement, values, commit=True)
+
+
+def delete_record_by_id(table_name: str, record_id: str) -> list[dict[str, Any]]:
+    statement, values = build_delete_statement(table_name, record_id)
+    return _fetch_statement(statement, values, commit=True)
+
+
 def ensure_auth_event_notifications_table() -> None:
     execute(
         """
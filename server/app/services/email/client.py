@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 import asyncio
-import smtplib
-from email.message import EmailMessage
 
 from server.app.config import Settings
+from server.app.services.email.outbox import NOTIFICATIONS_TRANSPORT, OutboundEmail, send_now
+
+HTML_FALLBACK_TEXT = "This email requires an HTML-capable email client."
 
 
 class EmailDeliveryError(RuntimeError):
@@ -15,6 +16,25 @@ class SMTPEmailClient:
     def __init__(self, settings: Settings):
         self._settings = settings
 
+    def build_html_email(
+        self,
+        *,
+        to_email: str,
+        subject: str,
+        html_body: str,
+        text_body: str | None = None,
+        dedupe_key: str | None = None,
+    ) -> OutboundEmail:
+        return OutboundEmail(
+            transport=NOTIFICATIONS_TRANSPORT,
+            from_email=self._settings.smtp_from,
+            to_email=to_email,
+            subject=subject,
+            text_body=text_body or HTML_FALLBACK_TEXT,
+            html_body=html_body,
+            dedupe_key=dedupe_key,
+        )
+
     async def send_html_email(
         self,
         *,
@@ -22,35 +42,13 @@ class SMTPEmailClient:
         subject: str,
         html_body: str,
     ) -> None:
-        await asyncio.to_thread(
-            self._send_html_email_sync,
-            to_email,
-            subject,
-            html_body,
-        )
+        await self.send_email(self.build_html_email(to_email=to_email, subject=subject, html_body=html_body))
 
-    def _send_html_email_sync(self, to_email: str, subject: str, html_body: str) -> None:
-        settings = self._settings
-        message = EmailMessage()
-        message["From"] = settings.smtp_from
-        message["To"] = to_email
-        message["Subject"] = subject
-        message.set_content("This email requires an HTML-capable email client.")
-        message.add_alternative(html_body, subtype="html")
+    async def send_email(self, email: OutboundEmail) -> None:
+        await asyncio.to_thread(self._send_email_sync, email)
 
+    def _send_email_sync(self, email: OutboundEmail) -> None:
         try:
-            if settings.smtp_use_ssl:
-                with smtplib.SMTP_SSL(settings.smtp_host, settings.smtp_port, timeout=20) as smtp:
-                    smtp.login(settings.smtp_username, settings.smtp_password)
-                    smtp.send_message(message)
-                return
-
-            with smtplib.SMTP(settings.smtp_host, settings.smtp_port, timeout=20) as smtp:
-                smtp.ehlo()
-                if settings.smtp_use_tls:
-                    smtp.starttls()
-                    smtp.ehlo()
-                smtp.login(settings.smtp_username, settings.smtp_password)
-                smtp.send_message(message)
+            send_now(email)
         except Exception as exc:  # pragma: no cover - network interaction
             raise EmailDeliveryError(str(exc)) from exc
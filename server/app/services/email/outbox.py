@@ -0,0 +1,306 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from email.message import EmailMessage
+from typing import Any, Callable, Sequence
+
+from psycopg.types.json import Jsonb
+
+from server.app.config import settings
+from server.app.services import async_database
+from server.app.services.database import is_database_configured
+from server.app.services.email.pool import SMTPServerConfig, get_smtp_pool
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATIONS_TRANSPORT = "notifications"
+# A job still marked "sending" after this long belongs to a worker that died mid-send.
+SENDING_LOCK_TIMEOUT_SECONDS = 300
+RETRY_BACKOFF_MAX_SECONDS = 3600
+
+OUTBOX_TABLE_DDL = (
+    """
+    create table if not exists public.email_outbox (
+      id uuid primary key,
+      transport text not null,
+      payload jsonb not null,
+      status text not null default 'pending',
+      attempts integer not null default 0,
+      max_attempts integer not null,
+      next_attempt_at timestamptz not null default now(),
+      locked_at timestamptz,
+      last_error text,
+      dedupe_key text unique,
+      created_at timestamptz not null default now(),
+      updated_at timestamptz not null default now(),
+      sent_at timestamptz
+    );
+    """,
+    """
+    create index if not exists email_outbox_due_idx
+    on public.email_outbox (status, next_attempt_at);
+    """,
+)
+
+CLAIM_QUERY = """
+with claimable as (
+  select id
+  from public.email_outbox
+  where (status = 'pending' and next_attempt_at <= now())
+     or (status = 'sending' and locked_at < now() - make_interval(secs => %s))
+  order by next_attempt_at
+  limit %s
+  for update skip locked
+)
+update public.email_outbox as outbox
+set status = 'sending', locked_at = now(), attempts = outbox.attempts + 1, updated_at = now()
+from claimable
+where outbox.id = claimable.id
+returning outbox.id::text as id, outbox.transport, outbox.payload, outbox.attempts, outbox.max_attempts
+"""
+
+MARK_SENT_QUERY = """
+update public.email_outbox
+set status = 'sent', sent_at = now(), locked_at = null, last_error = null, updated_at = now()
+where id = %s
+"""
+
+MARK_FAILED_QUERY = """
+update public.email_outbox
+set status = %s,
+    next_attempt_at = now() + make_interval(secs => %s),
+    locked_at = null,
+    last_error = %s,
+    updated_at = now()
+where id = %s
+"""
+
+
+@dataclass(frozen=True)
+class OutboundEmail:
+    transport: str
+    to_email: str
+    subject: str
+    text_body: str
+    html_body: str | None = None
+    from_email: str | None = None
+    reply_to: str | None = None
+    dedupe_key: str | None = None
+
+    def to_payload(self) -> dict[str, Any]:
+        payload = asdict(self)
+        payload.pop("transport")
+        payload.pop("dedupe_key")
+        return payload
+
+    @classmethod
+    def from_payload(cls, transport: str, payload: dict[str, Any]) -> OutboundEmail:
+        return cls(transport=transport, **payload)
+
+    def build_message(self) -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = self.from_email or settings.smtp_from
+        message["To"] = self.to_email
+        message["Subject"] = self.subject
+        if self.reply_to:
+            message["Reply-To"] = self.reply_to
+        message.set_content(self.text_body)
+        if self.html_body:
+            message.add_alternative(self.html_body, subtype="html")
+        return message
+
+
+_transports: dict[str, Callable[[], SMTPServerConfig]] = {
+    NOTIFICATIONS_TRANSPORT: lambda: SMTPServerConfig.from_settings(settings),
+}
+
+
+def register_transport(name: str, config_factory: Callable[[], SMTPServerConfig]) -> None:
+    """Name an SMTP account so queued jobs can store the name instead of credentials."""
+    _transports[name] = config_factory
+
+
+def send_now(email: OutboundEmail) -> None:
+    config_factory = _transports.get(email.transport)
+    if config_factory is None:
+        raise RuntimeError(f"Unknown email transport: {email.transport}")
+    get_smtp_pool(config_factory()).send_message(email.build_message())
+
+
+def outbox_enabled() -> bool:
+    return settings.email_outbox_enabled and is_database_configured()
+
+
+_table_ready = False
+_table_lock: asyncio.Lock | None = None
+
+
+async def ensure_outbox_table() -> None:
+    global _table_ready, _table_lock
+    if _table_ready:
+        return
+    if _table_lock is None:
+        _table_lock = asyncio.Lock()
+    async with _table_lock:
+        if not _table_ready:
+            for statement in OUTBOX_TABLE_DDL:
+                await async_database.execute(statement)
+            _table_ready = True
+
+
+async def enqueue_emails(emails: Sequence[OutboundEmail]) -> None:
+    """Persist emails for the outbox worker; a repeated dedupe_key is ignored."""
+    if not emails:
+        return
+    await ensure_outbox_table()
+    async with async_database.transaction() as cur:
+        await cur.executemany(
+            """
+            insert into public.email_outbox (id, transport, payload, max_attempts, dedupe_key)
+            values (%s, %s, %s, %s, %s)
+            on conflict (dedupe_key) do nothing
+            """,
+            [
+                (
+                    str(uuid.uuid4()),
+                    email.transport,
+                    Jsonb(email.to_payload()),
+                    settings.email_outbox_max_attempts,
+                    email.dedupe_key,
+                )
+                for email in emails
+            ],
+        )
+    wake_outbox_worker()
+
+
+def retry_delay_seconds(attempts: int) -> float:
+    delay = min(RETRY_BACKOFF_MAX_SECONDS, settings.email_outbox_retry_seconds * 2 ** max(0, attempts - 1))
+    return delay * random.uniform(0.75, 1.25)
+
+
+class OutboxWorker:
+    def __init__(self, *, batch_size: int, poll_seconds: float, max_concurrent_sends: int):
+        self._batch_size = batch_size
+        self._poll_seconds = poll_seconds
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        # Sends block on SMTP for up to SMTP_TIMEOUT, so they get their own threads rather than
+        # queueing ahead of file and database work on the loop's default executor.
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_sends, thread_name_prefix="email-outbox")
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="email-outbox")
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await asyncio.to_thread(self._executor.shutdown, wait=True)
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            try:
+                # Cheap once the table exists; retried on the next pass if the database was down.
+                await ensure_outbox_table()
+                processed = await self.run_once()
+            except Exception:
+                logger.exception("Email outbox pass failed")
+                processed = 0
+            if processed >= self._batch_size:
+                continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self._poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run_once(self) -> int:
+        async with async_database.transaction() as cur:
+            await cur.execute(CLAIM_QUERY, (SENDING_LOCK_TIMEOUT_SECONDS, self._batch_size))
+            jobs = await cur.fetchall()
+        if not jobs:
+            return 0
+
+        # The executor is sized like the SMTP pool, so queued sends wait here instead of holding threads.
+        loop = asyncio.get_running_loop()
+        outcomes = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    self._executor,
+                    send_now,
+                    OutboundEmail.from_payload(job["transport"], job["payload"]),
+                )
+                for job in jobs
+            ),
+            return_exceptions=True,
+        )
+
+        sent: list[tuple[Any, ...]] = []
+        failed: list[tuple[Any, ...]] = []
+        for job, outcome in zip(jobs, outcomes):
+            if not isinstance(outcome, BaseException):
+                sent.append((job["id"],))
+                continue
+            exhausted = job["attempts"] >= job["max_attempts"]
+            logger.warning(
+                "Email outbox job %s failed (attempt %s/%s): %s",
+                job["id"],
+                job["attempts"],
+                job["max_attempts"],
+                outcome,
+            )
+            failed.append(
+                (
+                    "failed" if exhausted else "pending",
+                    0 if exhausted else retry_delay_seconds(job["attempts"]),
+                    str(outcome)[:2000],
+                    job["id"],
+                )
+            )
+
+        async with async_database.transaction() as cur:
+            if sent:
+                await cur.executemany(MARK_SENT_QUERY, sent)
+            if failed:
+                await cur.executemany(MARK_FAILED_QUERY, failed)
+        return len(jobs)
+
+
+_worker: OutboxWorker | None = None
+
+
+def start_outbox_worker() -> None:
+    global _worker
+    if _worker is None and outbox_enabled():
+        _worker = OutboxWorker(
+            batch_size=settings.email_outbox_batch_size,
+            poll_seconds=settings.email_outbox_poll_seconds,
+            max_concurrent_sends=settings.smtp_pool_max_connections,
+        )
+        _worker.start()
+
+
+async def stop_outbox_worker() -> None:
+    global _worker
+    worker, _worker = _worker, None
+    if worker is not None:
+        await worker.stop()
+
+
+def wake_outbox_worker() -> None:
+    if _worker is not None:
+        _worker.wake()
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import logging
+import smtplib
+import threading
+import time
+from dataclasses import dataclass
+from email.message import Message
+
+from server.app.config import Settings, settings as default_settings
+from server.app.services.metrics import span
+
+logger = logging.getLogger(__name__)
+
+# The server refused this message but the session is still usable. smtplib's exceptions are
+# OSError subclasses, so these must be handled before the generic connection-failure case.
+REJECTED_MESSAGE_ERRORS = (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)
+
+
+@dataclass(frozen=True)
+class SMTPServerConfig:
+    host: str
+    port: int
+    username: str
+    password: str
+    use_tls: bool = True
+    use_ssl: bool = False
+    timeout: float = 20.0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> SMTPServerConfig:
+        return cls(
+            host=settings.smtp_host,
+            port=settings.smtp_port,
+            username=settings.smtp_username,
+            password=settings.smtp_password,
+            use_tls=settings.smtp_use_tls,
+            use_ssl=settings.smtp_use_ssl,
+            timeout=settings.smtp_timeout,
+        )
+
+
+class SMTPConnectionPool:
+    """Authenticated SMTP connections reused across sends, with a cap on concurrent sessions."""
+
+    def __init__(self, config: SMTPServerConfig, *, max_connections: int, max_idle_seconds: float):
+        self._config = config
+        self._max_idle_seconds = max_idle_seconds
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._idle: list[tuple[smtplib.SMTP, float]] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _connect(self) -> smtplib.SMTP:
+        config = self._config
+        if config.use_ssl:
+            smtp: smtplib.SMTP = smtplib.SMTP_SSL(config.host, config.port, timeout=config.timeout)
+        else:
+            smtp = smtplib.SMTP(config.host, config.port, timeout=config.timeout)
+        try:
+            smtp.ehlo()
+            if config.use_tls and not config.use_ssl:
+                smtp.starttls()
+                smtp.ehlo()
+            smtp.login(config.username, config.password)
+        except BaseException:
+            _quit_quietly(smtp)
+            raise
+        return smtp
+
+    def _checkout(self) -> tuple[smtplib.SMTP, bool]:
+        stale: list[smtplib.SMTP] = []
+        connection: smtplib.SMTP | None = None
+        with self._lock:
+            now = time.monotonic()
+            while self._idle:
+                candidate, released_at = self._idle.pop()
+                if now - released_at <= self._max_idle_seconds:
+                    connection = candidate
+                    break
+                stale.append(candidate)
+        for smtp in stale:
+            _quit_quietly(smtp)
+        if connection is not None:
+            return connection, True
+        return self._connect(), False
+
+    def _checkin(self, smtp: smtplib.SMTP) -> None:
+        with self._lock:
+            if not self._closed:
+                self._idle.append((smtp, time.monotonic()))
+                return
+        _quit_quietly(smtp)
+
+    def send_message(self, message: Message) -> None:
+        with span("smtp.send"), self._slots:
+            smtp, reused = self._checkout()
+            try:
+                smtp.send_message(message)
+            except REJECTED_MESSAGE_ERRORS:
+                self._checkin(smtp)
+                raise
+            except OSError:
+                _quit_quietly(smtp)
+                if not reused:
+                    raise
+                # The server dropped an idle session; retry once on a fresh one.
+                logger.info("Reconnecting to SMTP server %s", self._config.host)
+                smtp = self._connect()
+                try:
+                    smtp.send_message(message)
+                except BaseException:
+                    _quit_quietly(smtp)
+                    raise
+            except BaseException:
+                _quit_quietly(smtp)
+                raise
+            self._checkin(smtp)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for smtp, _ in idle:
+            _quit_quietly(smtp)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"idle": len(self._idle)}
+
+
+def _quit_quietly(smtp: smtplib.SMTP) -> None:
+    try:
+        smtp.quit()
+    except Exception:
+        smtp.close()
+
+
+_pools: dict[SMTPServerConfig, SMTPConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_smtp_pool(config: SMTPServerConfig) -> SMTPConnectionPool:
+    with _pools_lock:
+        pool = _pools.get(config)
+        if pool is None:
+            pool = SMTPConnectionPool(
+                config,
+                max_connections=default_settings.smtp_pool_max_connections,
+                max_idle_seconds=default_settings.smtp_pool_max_idle_seconds,
+            )
+            _pools[config] = pool
+        return pool
+
+
+def close_smtp_pools() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -1,6 +1,12 @@
 from __future__ import annotations
 
+import string
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Mapping
+
+_FORMATTER = string.Formatter()
 
 
 def escape_html(value: str) -> str:
@@ -26,69 +32,199 @@ def format_registered_at(value: str) -> str:
     return parsed.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
 
 
-def build_welcome_email_html(
-    *,
-    company_name: str,
-    user_name: str,
-    user_email: str,
-    dashboard_url: str,
-    logo_url: str,
-) -> str:
-    safe_company = escape_html(company_name)
-    safe_name = escape_html(user_name or "there")
-    safe_email = escape_html(user_email)
-    safe_logo = escape_html(logo_url)
-    safe_dashboard_url = escape_html(dashboard_url)
+class CompiledTemplate:
+    """A `{slot}` template parsed once into static fragments, with constants baked in."""
+
+    __slots__ = ("_head", "_parts", "_escape")
 
-    return f"""
+    def __init__(self, source: str, *, constants: Mapping[str, str] | None = None, escape: bool = True):
+        constants = constants or {}
+        fragments = [""]
+        slots: list[str] = []
+        for literal, field, format_spec, conversion in _FORMATTER.parse(source):
+            fragments[-1] += literal
+            if field is None:
+                continue
+            if format_spec or conversion:
+                raise ValueError(f"Template slot {{{field}}} cannot carry a format spec or conversion")
+            if field in constants:
+                value = constants[field]
+                fragments[-1] += escape_html(value) if escape else value
+            else:
+                slots.append(field)
+                fragments.append("")
+        # Each slot is paired with the static fragment that follows it.
+        self._head = fragments[0]
+        self._parts = tuple(zip(slots, fragments[1:]))
+        self._escape = escape
+
+    @property
+    def slots(self) -> tuple[str, ...]:
+        return tuple(slot for slot, _ in self._parts)
+
+    def render(self, **values: str) -> str:
+        parts = [self._head]
+        escape = self._escape
+        for slot, fragment in self._parts:
+            value = values[slot]
+            parts.append(escape_html(value) if escape else value)
+            parts.append(fragment)
+        return "".join(parts)
+
+
+@dataclass(frozen=True)
+class RenderedEmail:
+    html: str
+    text: str
+
+
+@dataclass(frozen=True)
+class EmailTemplate:
+    html: CompiledTemplate
+    text: CompiledTemplate
+
+    def render(self, **values: str) -> RenderedEmail:
+        return RenderedEmail(html=self.html.render(**values), text=self.text.render(**values))
+
+
+WELCOME_HTML = """
     <div style="font-family:Arial,sans-serif;max-width:640px;margin:0 auto;border:1px solid #e5e7eb;border-radius:12px;overflow:hidden;">
       <div style="background:#111827;color:#fff;padding:20px;text-align:center;">
-        <img src="{safe_logo}" alt="{safe_company} Logo" width="56" height="56" style="border-radius:8px;object-fit:cover;display:block;margin:0 auto 10px;">
-        <h2 style="margin:0;font-size:22px;">Welcome to {safe_company}</h2>
+        <img src="{logo_url}" alt="{company_name} Logo" width="56" height="56" style="border-radius:8px;object-fit:cover;display:block;margin:0 auto 10px;">
+        <h2 style="margin:0;font-size:22px;">Welcome to {company_name}</h2>
       </div>
       <div style="padding:22px;">
-        <p style="margin:0 0 12px;font-size:15px;">Hi {safe_name},</p>
+        <p style="margin:0 0 12px;font-size:15px;">Hi {user_name},</p>
         <p style="margin:0 0 12px;font-size:15px;">Your account has been created successfully.</p>
-        <p style="margin:0 0 16px;font-size:14px;color:#374151;"><strong>Account:</strong> {safe_email}</p>
-        <a href="{safe_dashboard_url}" style="display:inline-block;padding:10px 16px;background:#ef4444;color:#fff;text-decoration:none;border-radius:8px;font-weight:600;">
+        <p style="margin:0 0 16px;font-size:14px;color:#374151;"><strong>Account:</strong> {user_email}</p>
+        <a href="{dashboard_url}" style="display:inline-block;padding:10px 16px;background:#ef4444;color:#fff;text-decoration:none;border-radius:8px;font-weight:600;">
           Open Dashboard
         </a>
       </div>
     </div>
     """
 
+WELCOME_TEXT = """Welcome to {company_name}
 
-def build_admin_notification_html(
-    *,
-    company_name: str,
-    logo_url: str,
-    user_name: str,
-    user_email: str,
-    provider: str,
-    registered_at: str,
-) -> str:
-    safe_company = escape_html(company_name)
-    safe_logo = escape_html(logo_url)
-    safe_name = escape_html(user_name or "N/A")
-    safe_email = escape_html(user_email)
-    safe_provider = escape_html(provider.upper())
-    safe_registered_at = escape_html(format_registered_at(registered_at))
-
-    return f"""
+Hi {user_name},
+
+Your account has been created successfully.
+
+Account: {user_email}
+Open Dashboard: {dashboard_url}
+"""
+
+ADMIN_NOTIFICATION_HTML = """
     <div style="font-family:Arial,sans-serif;max-width:640px;margin:0 auto;border:1px solid #e5e7eb;border-radius:12px;overflow:hidden;">
       <div style="background:#111827;color:#fff;padding:20px;display:flex;align-items:center;gap:12px;">
-        <img src="{safe_logo}" alt="{safe_company} Logo" width="44" height="44" style="border-radius:8px;object-fit:cover;">
+        <img src="{logo_url}" alt="{company_name} Logo" width="44" height="44" style="border-radius:8px;object-fit:cover;">
         <div>
-          <div style="font-size:16px;font-weight:700;">{safe_company}</div>
+          <div style="font-size:16px;font-weight:700;">{company_name}</div>
           <div style="font-size:12px;opacity:0.9;">New user registration</div>
         </div>
       </div>
       <div style="padding:22px;">
-        <p style="margin:0 0 10px;font-size:15px;"><strong>User name:</strong> {safe_name}</p>
-        <p style="margin:0 0 10px;font-size:15px;"><strong>User email:</strong> {safe_email}</p>
-        <p style="margin:0 0 10px;font-size:15px;"><strong>Login provider:</strong> {safe_provider}</p>
-        <p style="margin:0;font-size:15px;"><strong>Registration time:</strong> {safe_registered_at}</p>
+        <p style="margin:0 0 10px;font-size:15px;"><strong>User name:</strong> {user_name}</p>
+        <p style="margin:0 0 10px;font-size:15px;"><strong>User email:</strong> {user_email}</p>
+        <p style="margin:0 0 10px;font-size:15px;"><strong>Login provider:</strong> {provider}</p>
+        <p style="margin:0;font-size:15px;"><strong>Registration time:</strong> {registered_at}</p>
       </div>
     </div>
     """
 
+ADMIN_NOTIFICATION_TEXT = """{company_name} - New user registration
+
+User name: {user_name}
+User email: {user_email}
+Login provider: {provider}
+Registration time: {registered_at}
+"""
+
+
+def _compile(html: str, text: str, constants: Mapping[str, str]) -> EmailTemplate:
+    return EmailTemplate(
+        html=CompiledTemplate(html, constants=constants),
+        text=CompiledTemplate(text, constants=constants, escape=False),
+    )
+
+
+@lru_cache(maxsize=8)
+def welcome_email_template(company_name: str, logo_url: str) -> EmailTemplate:
+    return _compile(WELCOME_HTML, WELCOME_TEXT, {"company_name": company_name, "logo_url": logo_url})
+
+
+@lru_cache(maxsize=8)
+def admin_notification_template(company_name: str, logo_url: str) -> EmailTemplate:
+    return _compile(
+        ADMIN_NOTIFICATION_HTML,
+        ADMIN_NOTIFICATION_TEXT,
+        {"company_name": company_name, "logo_url": logo_url},
+    )
+
+
+def render_welcome_email(
+    *,
+    company_name: str,
+    user_name: str,
+    user_email: str,
+    dashboard_url: str,
+    logo_url: str,
+) -> RenderedEmail:
+    return welcome_email_template(company_name, logo_url).render(
+        user_name=user_name or "there",
+        user_email=user_email,
+        dashboard_url=dashboard_url,
+    )
+
+
+def render_admin_notification(
+    *,
+    company_name: str,
+    logo_url: str,
+    user_name: str,
+    user_email: str,
+    provider: str,
+    registered_at: str,
+) -> RenderedEmail:
+    return admin_notification_template(company_name, logo_url).render(
+        user_name=user_name or "N/A",
+        user_email=user_email,
+        provider=provider.upper(),
+        registered_at=format_registered_at(registered_at),
+    )
+
+
+def build_welcome_email_html(
+    *,
+    company_name: str,
+    user_name: str,
+    user_email: str,
+    dashboard_url: str,
+    logo_url: str,
+) -> str:
+    return render_welcome_email(
+        company_name=company_name,
+        user_name=user_name,
+        user_email=user_email,
+        dashboard_url=dashboard_url,
+        logo_url=logo_url,
+    ).html
+
+
+def build_admin_notification_html(
+    *,
+    company_name: str,
+    logo_url: str,
+    user_name: str,
+    user_email: str,
+    provider: str,
+    registered_at: str,
+) -> str:
+    return render_admin_notification(
+        company_name=company_name,
+        logo_url=logo_url,
+        user_name=user_name,
+        user_email=user_email,
+        provider=provider,
+        registered_at=registered_at,
+    ).html
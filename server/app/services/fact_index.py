@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Any, Callable, Sequence
+
+EXACT_PHRASE_BASE_SCORE = 7.0
+EXACT_TOKEN_SCORE = 1.0
+FUZZY_TOKEN_SCORE = 0.7
+FUZZY_MIN_TOKEN_LENGTH = 4
+FUZZY_MIN_RATIO = 0.88
+TOKEN_SCORE_MULTIPLIER = 2.5
+
+
+@dataclass(frozen=True)
+class _Keyword:
+    fact_position: int
+    tokens: tuple[str, ...]
+    phrase_score: float
+    required_score: float
+
+
+class _PhraseAutomaton:
+    """Aho-Corasick automaton reporting every pattern that occurs as a substring of a text."""
+
+    def __init__(self, patterns: Sequence[str]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[tuple[int, ...]] = [()]
+
+        for pattern_id, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                state = next_state
+            self._output[state] += (pattern_id,)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def find(self, text: str) -> set[int]:
+        found: set[int] = set()
+        state = 0
+        for char in text:
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            if self._output[state]:
+                found.update(self._output[state])
+        return found
+
+
+class FactIndex:
+    """Keyword index over fact entries; scores match a full per-keyword scan of every fact."""
+
+    def __init__(
+        self,
+        facts: Sequence[dict[str, Any]],
+        *,
+        normalize: Callable[[str], str],
+        fuzzy_cache_size: int = 4096,
+    ):
+        self._facts = tuple(facts)
+        self._keywords: list[_Keyword] = []
+        phrase_ids: dict[str, int] = {}
+        phrase_keywords: list[list[int]] = []
+        self._keywords_by_token: dict[str, list[int]] = {}
+        fuzzy_tokens: set[str] = set()
+
+        for fact_position, fact in enumerate(self._facts):
+            for keyword in fact["keywords"]:
+                normalized_keyword = normalize(keyword)
+                tokens = tuple(normalized_keyword.split())
+                if not normalized_keyword or not tokens:
+                    continue
+
+                keyword_id = len(self._keywords)
+                self._keywords.append(
+                    _Keyword(
+                        fact_position=fact_position,
+                        tokens=tokens,
+                        phrase_score=EXACT_PHRASE_BASE_SCORE + float(len(tokens)),
+                        required_score=1.0 if len(tokens) == 1 else max(1.6, len(tokens) * 0.7),
+                    )
+                )
+
+                phrase_id = phrase_ids.setdefault(normalized_keyword, len(phrase_keywords))
+                if phrase_id == len(phrase_keywords):
+                    phrase_keywords.append([])
+                phrase_keywords[phrase_id].append(keyword_id)
+
+                for token in set(tokens):
+                    self._keywords_by_token.setdefault(token, []).append(keyword_id)
+                    if len(token) >= FUZZY_MIN_TOKEN_LENGTH:
+                        fuzzy_tokens.add(token)
+
+        self._phrase_keywords = tuple(tuple(ids) for ids in phrase_keywords)
+        self._phrases = _PhraseAutomaton(list(phrase_ids))
+        self._fuzzy_tokens_by_length: dict[int, tuple[str, ...]] = {}
+        for token in sorted(fuzzy_tokens):
+            self._fuzzy_tokens_by_length.setdefault(len(token), ())
+            self._fuzzy_tokens_by_length[len(token)] += (token,)
+        self._fuzzy_matches = lru_cache(maxsize=fuzzy_cache_size)(self._compute_fuzzy_matches)
+
+    def _compute_fuzzy_matches(self, query_token: str) -> frozenset[str]:
+        query_length = len(query_token)
+        matcher = SequenceMatcher(None, "", query_token)
+        matches: set[str] = set()
+        for length, tokens in self._fuzzy_tokens_by_length.items():
+            # ratio() can never exceed 2 * min(len) / (len_a + len_b).
+            if 2.0 * min(length, query_length) / (length + query_length) < FUZZY_MIN_RATIO:
+                continue
+            for token in tokens:
+                matcher.set_seq1(token)
+                if matcher.quick_ratio() >= FUZZY_MIN_RATIO and matcher.ratio() >= FUZZY_MIN_RATIO:
+                    matches.add(token)
+        return frozenset(matches)
+
+    def _score_keyword(
+        self,
+        keyword: _Keyword,
+        query_tokens: tuple[str, ...],
+        fuzzy_hits: set[str],
+    ) -> float:
+        match_score = 0.0
+        for token in keyword.tokens:
+            if token in query_tokens:
+                match_score += EXACT_TOKEN_SCORE
+            elif len(token) >= FUZZY_MIN_TOKEN_LENGTH and token in fuzzy_hits:
+                match_score += FUZZY_TOKEN_SCORE
+
+        if match_score >= keyword.required_score:
+            return match_score * TOKEN_SCORE_MULTIPLIER
+        return 0.0
+
+    def match(self, normalized_query: str, query_tokens: tuple[str, ...]) -> list[tuple[float, dict[str, Any]]]:
+        best_scores: dict[int, float] = {}
+
+        phrase_hits: set[int] = set()
+        for phrase_id in self._phrases.find(normalized_query):
+            phrase_hits.update(self._phrase_keywords[phrase_id])
+        for keyword_id in phrase_hits:
+            keyword = self._keywords[keyword_id]
+            if keyword.phrase_score > best_scores.get(keyword.fact_position, 0.0):
+                best_scores[keyword.fact_position] = keyword.phrase_score
+
+        fuzzy_hits: set[str] = set()
+        candidates: set[int] = set()
+        for query_token in set(query_tokens):
+            candidates.update(self._keywords_by_token.get(query_token, ()))
+            if len(query_token) >= FUZZY_MIN_TOKEN_LENGTH:
+                for token in self._fuzzy_matches(query_token):
+                    fuzzy_hits.add(token)
+                    candidates.update(self._keywords_by_token[token])
+
+        for keyword_id in candidates - phrase_hits:
+            keyword = self._keywords[keyword_id]
+            score = self._score_keyword(keyword, query_tokens, fuzzy_hits)
+            if score > best_scores.get(keyword.fact_position, 0.0):
+                best_scores[keyword.fact_position] = score
+
+        matches: list[tuple[float, dict[str, Any]]] = []
+        for fact_position in sorted(best_scores):
+            fact = self._facts[fact_position]
+            score = best_scores[fact_position]
+            if score >= float(fact.get("threshold", 4.0)):
+                matches.append((score, fact))
+
+        matches.sort(key=lambda entry: entry[0], reverse=True)
+        return matches
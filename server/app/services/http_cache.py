@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+
+@dataclass(frozen=True)
+class RenderedJSON:
+    body: bytes
+    etag: str
+
+
+def render_json(payload: Any) -> RenderedJSON:
+    body = json.dumps(
+        jsonable_encoder(payload),
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    return RenderedJSON(body=body, etag=etag)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    candidates = [value.strip() for value in if_none_match.split(",") if value.strip()]
+    if "*" in candidates:
+        return True
+    # If-None-Match uses weak comparison, and proxies such as nginx weaken ETags when compressing.
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def conditional_json_response(request: Request, rendered: RenderedJSON, cache_control: str) -> Response:
+    headers = {"ETag": rendered.etag}
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, rendered.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=rendered.body, media_type="application/json", headers=headers)
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import importlib.util
+
+import httpx
+
+from server.app.config import settings
+
+_client: httpx.AsyncClient | None = None
+
+
+def _http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+def _build_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=settings.llm_http2 and _http2_available(),
+        timeout=httpx.Timeout(settings.llm_http_timeout, connect=settings.llm_http_connect_timeout),
+        limits=httpx.Limits(
+            max_connections=settings.llm_http_max_connections,
+            max_keepalive_connections=settings.llm_http_max_keepalive,
+            keepalive_expiry=settings.llm_http_keepalive_expiry,
+        ),
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    client, _client = _client, None
+    if client is not None and not client.is_closed:
+        await client.aclose()
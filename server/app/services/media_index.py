@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import threading
+
+from server.app.services.database import execute, is_database_configured, transaction
+
+_tables_ready = False
+_tables_lock = threading.Lock()
+
+
+def ensure_media_index_tables() -> None:
+    global _tables_ready
+    if _tables_ready:
+        return
+    with _tables_lock:
+        if _tables_ready:
+            return
+        execute(
+            """
+            create table if not exists public.media_blobs (
+              bucket text not null,
+              blob_path text not null,
+              sha256 text not null,
+              size_bytes bigint not null,
+              ref_count integer not null default 0,
+              created_at timestamptz not null default now(),
+              primary key (bucket, blob_path)
+            );
+            """
+        )
+        execute(
+            """
+            create index if not exists media_blobs_sha256_idx
+            on public.media_blobs (sha256);
+            """
+        )
+        execute(
+            """
+            create table if not exists public.media_objects (
+              bucket text not null,
+              object_path text not null,
+              blob_path text not null,
+              created_at timestamptz not null default now(),
+              updated_at timestamptz not null default now(),
+              primary key (bucket, object_path),
+              foreign key (bucket, blob_path) references public.media_blobs (bucket, blob_path)
+            );
+            """
+        )
+        _tables_ready = True
+
+
+def record_media_reference(
+    *,
+    bucket: str,
+    object_path: str,
+    blob_path: str,
+    sha256: str,
+    size: int,
+) -> None:
+    """Map a logical path to its blob; ref_count is how many logical paths currently point at each blob."""
+    if not is_database_configured():
+        return
+    ensure_media_index_tables()
+
+    with transaction() as cur:
+        cur.execute(
+            """
+            insert into public.media_blobs (bucket, blob_path, sha256, size_bytes)
+            values (%s, %s, %s, %s)
+            on conflict (bucket, blob_path) do nothing
+            """,
+            (bucket, blob_path, sha256, size),
+        )
+        cur.execute(
+            """
+            select blob_path
+            from public.media_objects
+            where bucket = %s and object_path = %s
+            for update
+            """,
+            (bucket, object_path),
+        )
+        previous = cur.fetchone()
+        previous_blob = previous["blob_path"] if previous else None
+        if previous_blob == blob_path:
+            return
+
+        cur.execute(
+            """
+            insert into public.media_objects (bucket, object_path, blob_path)
+            values (%s, %s, %s)
+            on conflict (bucket, object_path)
+            do update set blob_path = excluded.blob_path, updated_at = now()
+            """,
+            (bucket, object_path, blob_path),
+        )
+        cur.execute(
+            "update public.media_blobs set ref_count = ref_count + 1 where bucket = %s and blob_path = %s",
+            (bucket, blob_path),
+        )
+        if previous_blob:
+            cur.execute(
+                "update public.media_blobs set ref_count = greatest(ref_count - 1, 0) where bucket = %s and blob_path = %s",
+                (bucket, previous_blob),
+            )
+
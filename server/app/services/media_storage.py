@@ -1,13 +1,29 @@
 from __future__ import annotations
 
+import hashlib
+import io
+import logging
 import os
 import random
 import re
+import tempfile
 import time
 from pathlib import Path
+from typing import Any, BinaryIO
 from urllib.parse import quote
 
 from server.app.config import settings
+from server.app.services.media_index import record_media_reference
+from server.app.services.metrics import span
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+BLOB_DIRECTORY = "blobs"
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured maximum size."""
 
 
 def normalize_object_path(raw_path: str | None, fallback_ext: str) -> str:
@@ -39,20 +55,135 @@ def build_public_media_url(object_path: str, bucket_name: str | None = None) ->
     return f"{settings.media_base_url.rstrip('/')}/{quote(bucket)}/{encoded_path}"
 
 
-def store_uploaded_file(
+def _fsync_directory(path: Path) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _write_stream_to_temp(
+    source: BinaryIO,
+    directory: Path,
+    max_bytes: int | None,
+) -> tuple[str, int, str]:
+    directory.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(prefix=".upload-", suffix=".part", dir=directory)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            while True:
+                chunk = source.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_bytes and size > max_bytes:
+                    raise UploadTooLargeError(f"Upload exceeds the {max_bytes} byte limit")
+                digest.update(chunk)
+                handle.write(chunk)
+    except BaseException:
+        _discard_temp(temp_name)
+        raise
+    return temp_name, size, digest.hexdigest()
+
+
+def _discard_temp(temp_name: str) -> None:
+    try:
+        os.unlink(temp_name)
+    except FileNotFoundError:
+        pass
+
+
+def _commit_temp(temp_name: str, absolute_path: Path) -> None:
+    with span("file.commit"):
+        try:
+            fd = os.open(temp_name, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            absolute_path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(temp_name, absolute_path)
+        except BaseException:
+            _discard_temp(temp_name)
+            raise
+        _fsync_directory(absolute_path.parent)
+
+
+def content_addressed_path(sha256: str, object_path: str) -> str:
+    ext = re.sub(r"[^A-Za-z0-9]", "", os.path.splitext(object_path)[1].lstrip(".")).lower()
+    filename = f"{sha256}.{ext}" if ext else sha256
+    return f"{BLOB_DIRECTORY}/{sha256[:2]}/{filename}"
+
+
+def store_uploaded_stream(
     *,
-    buffer: bytes,
+    source: BinaryIO,
     object_path: str,
     bucket_name: str | None = None,
-) -> dict[str, str]:
+    max_bytes: int | None = None,
+    deduplicate: bool | None = None,
+) -> dict[str, Any]:
     bucket = (bucket_name or settings.storage_bucket).strip() or "cms-uploads"
     bucket_root = ensure_media_bucket(bucket)
+    if deduplicate is None:
+        deduplicate = settings.media_deduplicate
+
     absolute_path = bucket_root.joinpath(*object_path.split("/"))
-    absolute_path.parent.mkdir(parents=True, exist_ok=True)
-    absolute_path.write_bytes(buffer)
+    # Stage next to the final location so the rename stays on one filesystem and is atomic.
+    staging_dir = bucket_root.joinpath(BLOB_DIRECTORY) if deduplicate else absolute_path.parent
+    with span("file.write"):
+        temp_name, size, sha256 = _write_stream_to_temp(source, staging_dir, max_bytes)
+
+    stored_path = object_path
+    deduplicated = False
+    if deduplicate:
+        stored_path = content_addressed_path(sha256, object_path)
+        absolute_path = bucket_root.joinpath(*stored_path.split("/"))
+        if absolute_path.exists():
+            _discard_temp(temp_name)
+            deduplicated = True
+        else:
+            _commit_temp(temp_name, absolute_path)
+        try:
+            record_media_reference(
+                bucket=bucket,
+                object_path=object_path,
+                blob_path=stored_path,
+                sha256=sha256,
+                size=size,
+            )
+        except Exception:
+            logger.exception("Failed to index media object %s", object_path)
+    else:
+        _commit_temp(temp_name, absolute_path)
 
     return {
-        "path": object_path,
+        "path": stored_path,
+        "object_path": object_path,
         "absolute_path": os.fspath(absolute_path),
-        "public_url": build_public_media_url(object_path, bucket),
+        "public_url": build_public_media_url(stored_path, bucket),
+        "size": size,
+        "sha256": sha256,
+        "deduplicated": deduplicated,
     }
+
+
+def store_uploaded_file(
+    *,
+    buffer: bytes,
+    object_path: str,
+    bucket_name: str | None = None,
+) -> dict[str, Any]:
+    return store_uploaded_stream(
+        source=io.BytesIO(buffer),
+        object_path=object_path,
+        bucket_name=bucket_name,
+    )
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import importlib.util
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from server.app.config import settings
+from server.app.services.media_storage import build_public_media_url, ensure_media_bucket
+from server.app.services.metrics import span
+
+logger = logging.getLogger(__name__)
+
+VARIANT_DIRECTORY = "variants"
+VARIANT_SOURCE_EXTENSIONS = {"jpg", "jpeg", "png", "webp", "gif", "bmp", "tif", "tiff", "avif"}
+PILLOW_SAVE_FORMATS = {"webp": "WEBP", "avif": "AVIF"}
+# EXIF orientations that rotate the image by 90 degrees, swapping width and height.
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+_pending: set[tuple[str, str]] = set()
+_pending_lock = threading.Lock()
+
+
+def pillow_available() -> bool:
+    return importlib.util.find_spec("PIL") is not None
+
+
+@lru_cache(maxsize=1)
+def supported_variant_formats() -> tuple[str, ...]:
+    if not pillow_available():
+        return ()
+    from PIL import Image
+
+    Image.init()
+    return tuple(
+        fmt
+        for fmt in settings.media_variant_formats
+        if PILLOW_SAVE_FORMATS.get(fmt) in Image.SAVE
+    )
+
+
+def variant_path(sha256: str, width: int, fmt: str) -> str:
+    return f"{VARIANT_DIRECTORY}/{sha256[:2]}/{sha256}/{width}w.{fmt}"
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.media_variant_workers,
+                    thread_name_prefix="media-variants",
+                )
+    return _executor
+
+
+def close_variant_workers() -> None:
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+def _display_width(source: Path) -> int | None:
+    from PIL import Image
+
+    try:
+        # Image.open only parses the header, so this stays cheap for large files.
+        with Image.open(source) as image:
+            if image.getexif().get(0x0112) in TRANSPOSED_ORIENTATIONS:
+                return image.height
+            return image.width
+    except Exception:
+        return None
+
+
+def plan_variants(
+    *,
+    absolute_path: str,
+    object_path: str,
+    sha256: str,
+    bucket_name: str | None = None,
+) -> list[dict[str, Any]]:
+    if not settings.media_variant_widths:
+        return []
+    ext = os.path.splitext(object_path)[1].lstrip(".").lower()
+    formats = supported_variant_formats()
+    if ext not in VARIANT_SOURCE_EXTENSIONS or not formats:
+        return []
+
+    source_width = _display_width(Path(absolute_path))
+    if not source_width:
+        return []
+
+    variants: list[dict[str, Any]] = []
+    for width in settings.media_variant_widths:
+        if width >= source_width:
+            continue
+        for fmt in formats:
+            path = variant_path(sha256, width, fmt)
+            variants.append(
+                {
+                    "width": width,
+                    "format": fmt,
+                    "path": path,
+                    "url": build_public_media_url(path, bucket_name),
+                }
+            )
+    return variants
+
+
+def _save_variant(image: Any, target: Path, fmt: str) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(prefix=".variant-", suffix=".part", dir=target.parent)
+    try:
+        with span("file.variant_write"), os.fdopen(fd, "wb") as handle:
+            image.save(handle, format=PILLOW_SAVE_FORMATS[fmt], quality=settings.media_variant_quality)
+        os.replace(temp_name, target)
+    except BaseException:
+        try:
+            os.unlink(temp_name)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _generate_variants(source: Path, bucket_root: Path, variants: list[dict[str, Any]]) -> None:
+    from PIL import Image, ImageOps
+
+    try:
+        with Image.open(source) as opened:
+            image = ImageOps.exif_transpose(opened)
+            if image.mode not in {"RGB", "RGBA"}:
+                has_alpha = "A" in image.getbands() or "transparency" in image.info
+                image = image.convert("RGBA" if has_alpha else "RGB")
+
+            # Each smaller width is resampled from the previous one rather than the full-size original.
+            for width in sorted({variant["width"] for variant in variants}, reverse=True):
+                height = max(1, round(image.height * width / image.width))
+                image = image.resize((width, height), Image.Resampling.LANCZOS)
+                for variant in variants:
+                    if variant["width"] == width:
+                        target = bucket_root.joinpath(*variant["path"].split("/"))
+                        _save_variant(image, target, variant["format"])
+    except Exception:
+        logger.exception("Failed to generate image variants for %s", source)
+
+
+def schedule_variants(
+    *,
+    absolute_path: str,
+    object_path: str,
+    sha256: str,
+    bucket_name: str | None = None,
+) -> list[dict[str, Any]]:
+    """Return variant URLs for an uploaded image and queue any that are not on disk yet."""
+    variants = plan_variants(
+        absolute_path=absolute_path,
+        object_path=object_path,
+        sha256=sha256,
+        bucket_name=bucket_name,
+    )
+    if not variants:
+        return []
+
+    bucket_root = ensure_media_bucket(bucket_name)
+    missing = [
+        variant
+        for variant in variants
+        if not bucket_root.joinpath(*variant["path"].split("/")).exists()
+    ]
+    if missing:
+        key = (os.fspath(bucket_root), sha256)
+        with _pending_lock:
+            if key in _pending:
+                return variants
+            _pending.add(key)
+        future = _get_executor().submit(_generate_variants, Path(absolute_path), bucket_root, missing)
+        future.add_done_callback(lambda _: _release_pending(key))
+    return variants
+
+
+def _release_pending(key: tuple[str, str]) -> None:
+    with _pending_lock:
+        _pending.discard(key)
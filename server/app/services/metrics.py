@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Awaitable, Callable, MutableMapping
+
+from server.app.config import settings
+
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+# Seconds; the upper end leaves room for slow LLM completions.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, label_names: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for label_values, value in values:
+            lines.append(f"{self.name}{_format_labels(self.label_names, label_values)} {_format_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: one non-cumulative count per bucket plus the +Inf overflow, then sum.
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = ([0] * (len(self.buckets) + 1), [0.0])
+                self._series[label_values] = series
+            series[0][index] += 1
+            series[1][0] += value
+
+    def render(self) -> list[str]:
+        with self._lock:
+            snapshot = [
+                (label_values, list(counts), total[0])
+                for label_values, (counts, total) in sorted(self._series.items())
+            ]
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        bounds = [*self.buckets, float("inf")]
+        for label_values, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                labels = _format_labels(self.label_names, label_values, f'le="{_format_number(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, label_values)
+            lines.append(f"{self.name}_sum{labels} {_format_number(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests handled, by route template and status code.",
+    ("method", "route", "status"),
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request until its response body is fully sent.",
+    ("method", "route"),
+)
+SPAN_LATENCY = Histogram(
+    "span_duration_seconds",
+    "Time spent in instrumented sections such as database, Groq, SMTP and file I/O.",
+    ("span",),
+)
+SPAN_ERRORS = Counter(
+    "span_errors_total",
+    "Instrumented sections that exited with an exception.",
+    ("span",),
+)
+REGISTRY = (HTTP_REQUESTS, HTTP_LATENCY, SPAN_LATENCY, SPAN_ERRORS)
+
+
+class span:
+    """Time a block into span_duration_seconds; works around awaits and in worker threads."""
+
+    __slots__ = ("name", "_started")
+
+    def __init__(self, name: str):
+        self.name = name
+        self._started = 0.0
+
+    def __enter__(self) -> span:
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        if not settings.metrics_enabled:
+            return
+        SPAN_LATENCY.observe(time.perf_counter() - self._started, self.name)
+        if exc_type is not None:
+            SPAN_ERRORS.inc(self.name)
+
+
+def render_metrics() -> str:
+    lines: list[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request counts and latency per route template."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._route_paths: dict[Any, str] = {}
+
+    def _route_label(self, scope: Scope) -> str:
+        # The router leaves the matched endpoint in the scope; map it back to its path template
+        # so /api/projects/{project_id} is one series rather than one per id.
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        path = self._route_paths.get(endpoint)
+        if path is None:
+            routes = getattr(scope.get("app"), "routes", ())
+            self._route_paths = {
+                route.endpoint: route.path for route in routes if getattr(route, "endpoint", None) is not None
+            }
+            path = self._route_paths.setdefault(endpoint, UNMATCHED_ROUTE)
+        return path
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            method = scope["method"]
+            route = self._route_label(scope)
+            HTTP_LATENCY.observe(time.perf_counter() - started, method, route)
+            HTTP_REQUESTS.inc(method, route, str(status))
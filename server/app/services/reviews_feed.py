@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+from typing import Any, Collection
+
+from psycopg import sql
+
+from server.app.services.async_database import _fetch_statement
+from server.app.services.database import build_page, decode_cursor
+from server.app.services.schema_catalog import get_schema
+
+# Legacy testimonial tables name some fields differently; the first non-empty column present wins,
+# mirroring the `or` chains in _map_testimonial_to_review.
+TEXT_FIELD_SOURCES: dict[str, tuple[str, ...]] = {
+    "name": ("name",),
+    "role": ("role",),
+    "company": ("company",),
+    "country": ("country",),
+    "image_url": ("image_url", "avatar_url"),
+    "project": ("service_tag", "project"),
+}
+# Carried through from either table when present, so clients can sort and show edit times.
+PASSTHROUGH_FIELDS: dict[str, str] = {"display_order": "integer", "updated_at": "timestamptz"}
+FEED_FIELDS = frozenset({"id", *TEXT_FIELD_SOURCES, "content", "rating", "status", "created_at", *PASSTHROUGH_FIELDS})
+DRAFT_STATUSES = ("draft", "unpublished", "hidden")
+
+
+def _first_present(
+    columns: Collection[str],
+    candidates: tuple[str, ...],
+    cast: str,
+    empty: sql.Composable,
+    fallback: sql.Composable | None = None,
+) -> sql.Composable:
+    """coalesce() that, like Python's `or`, skips empty values; only the last candidate is kept as is."""
+    present = [name for name in candidates if name in columns]
+    if not present:
+        return fallback if fallback is not None else sql.SQL("null::{}").format(sql.SQL(cast))
+    parts: list[sql.Composable] = []
+    for name in present:
+        value = sql.SQL("{}::{}").format(sql.Identifier(name), sql.SQL(cast))
+        if fallback is not None or name != candidates[-1]:
+            value = sql.SQL("nullif({}, {})").format(value, empty)
+        parts.append(value)
+    if fallback is not None:
+        parts.append(fallback)
+    if len(parts) == 1:
+        return parts[0]
+    return sql.SQL("coalesce({})").format(sql.SQL(", ").join(parts))
+
+
+def _text(columns: Collection[str], candidates: tuple[str, ...], fallback: sql.Composable | None = None) -> sql.Composable:
+    return _first_present(columns, candidates, "text", sql.SQL("''"), fallback)
+
+
+def _passthrough(columns: Collection[str]) -> list[sql.Composable]:
+    selected: list[sql.Composable] = []
+    for field, cast in PASSTHROUGH_FIELDS.items():
+        value = sql.SQL("{}::{}").format(sql.Identifier(field), sql.SQL(cast)) if field in columns else sql.SQL(
+            "null::{}"
+        ).format(sql.SQL(cast))
+        selected.append(sql.SQL("{} as {}").format(value, sql.Identifier(field)))
+    return selected
+
+
+def _extra_columns(reviews_columns: Collection[str]) -> list[str]:
+    return sorted(set(reviews_columns) - FEED_FIELDS)
+
+
+def _testimonial_is_live(columns: Collection[str]) -> sql.Composable:
+    # Mirrors _is_live_review_row: is_published wins, then a draft-like status, otherwise live.
+    from_status: sql.Composable = sql.SQL("true")
+    if "status" in columns:
+        from_status = sql.SQL("lower(trim(coalesce({}::text, ''))) not in ({})").format(
+            sql.Identifier("status"),
+            sql.SQL(", ").join(sql.Literal(value) for value in DRAFT_STATUSES),
+        )
+    if "is_published" in columns:
+        return sql.SQL("coalesce({}, {})").format(sql.Identifier("is_published"), from_status)
+    return from_status
+
+
+def _reviews_branch(
+    columns: Collection[str],
+    extras: list[str],
+    status: str | None,
+) -> tuple[sql.Composable, list[Any]]:
+    # Rows from reviews are returned as stored, like the old select *; absent fields are stripped later.
+    selected = [sql.SQL("{}::text as {}").format(sql.Identifier("id"), sql.Identifier("id"))]
+    for field in (*TEXT_FIELD_SOURCES, "content"):
+        selected.append(sql.SQL("{} as {}").format(_text(columns, (field,)), sql.Identifier(field)))
+    selected.append(sql.SQL("{} as rating").format(_first_present(columns, ("rating",), "int", sql.SQL("0"))))
+    selected.append(sql.SQL("{} as status").format(_text(columns, ("status",))))
+    selected.append(sql.SQL("created_at"))
+    selected.extend(_passthrough(columns))
+    selected.extend(sql.Identifier(name) for name in extras)
+    selected.append(sql.SQL("'reviews' as _source"))
+
+    statement = sql.SQL("select {} from {}").format(
+        sql.SQL(", ").join(selected),
+        sql.Identifier("public", "reviews"),
+    )
+    params: list[Any] = []
+    if status and "status" in columns:
+        statement += sql.SQL(" where {} = {}").format(sql.Identifier("status"), sql.Placeholder())
+        params.append(status)
+    elif status:
+        statement += sql.SQL(" where false")
+    return statement, params
+
+
+def _testimonials_branch(
+    columns: Collection[str],
+    extras: list[str],
+    status: str | None,
+) -> tuple[sql.Composable, list[Any]]:
+    is_live = _testimonial_is_live(columns)
+    selected = [sql.SQL("{}::text as {}").format(sql.Identifier("id"), sql.Identifier("id"))]
+    for field, candidates in TEXT_FIELD_SOURCES.items():
+        selected.append(sql.SQL("{} as {}").format(_text(columns, candidates), sql.Identifier(field)))
+    selected.append(sql.SQL("{} as content").format(_text(columns, ("content", "review"), sql.SQL("''"))))
+    selected.append(
+        sql.SQL("{} as rating").format(_first_present(columns, ("rating", "stars"), "int", sql.SQL("0"), sql.SQL("5")))
+    )
+    selected.append(sql.SQL("case when {} then 'live' else 'draft' end as status").format(is_live))
+    selected.append(sql.SQL("created_at"))
+    selected.extend(_passthrough(columns))
+    selected.extend(sql.SQL("null as {}").format(sql.Identifier(name)) for name in extras)
+    selected.append(sql.SQL("'testimonials' as _source"))
+
+    statement = sql.SQL("select {} from {}").format(
+        sql.SQL(", ").join(selected),
+        sql.Identifier("public", "testimonials"),
+    )
+    # Only "live" and "draft" filter testimonials; other status values leave them all in, as before.
+    if status == "live":
+        statement += sql.SQL(" where {}").format(is_live)
+    elif status == "draft":
+        statement += sql.SQL(" where not {}").format(is_live)
+    return statement, []
+
+
+def build_reviews_feed_statement(
+    *,
+    reviews_columns: Collection[str],
+    testimonial_columns: Collection[str],
+    status: str | None = None,
+    limit: int | None = None,
+    after: str | None = None,
+) -> tuple[sql.Composed, list[Any]] | None:
+    branches: list[sql.Composable] = []
+    params: list[Any] = []
+    extras = _extra_columns(reviews_columns) if "id" in reviews_columns and "created_at" in reviews_columns else []
+    for columns, build in ((reviews_columns, _reviews_branch), (testimonial_columns, _testimonials_branch)):
+        if "id" in columns and "created_at" in columns:
+            branch, branch_params = build(columns, extras, status)
+            branches.append(branch)
+            params.extend(branch_params)
+    if not branches:
+        return None
+
+    statement = sql.SQL("select * from ({}) as feed").format(sql.SQL(" union all ").join(branches))
+    if after:
+        created_at, record_id = decode_cursor(after)
+        statement += sql.SQL(" where (created_at, id) < ({}::timestamptz, {})").format(
+            sql.Placeholder(),
+            sql.Placeholder(),
+        )
+        params.extend([created_at, record_id])
+    if limit is None and not after:
+        # The plain list follows the manual order, like the CMS lists; pages stay on the created_at keyset.
+        statement += sql.SQL(" order by display_order asc nulls last, created_at desc, id desc")
+    else:
+        statement += sql.SQL(" order by created_at desc, id desc")
+    if limit is not None:
+        statement += sql.SQL(" limit {}").format(sql.Placeholder())
+        params.append(limit + 1)
+    return statement, params
+
+
+def _trim_rows(rows: list[dict[str, Any]], reviews_columns: Collection[str]) -> list[dict[str, Any]]:
+    # The union gives every row every column; hand each one back with only the keys its source has.
+    extras = set(_extra_columns(reviews_columns))
+    missing = FEED_FIELDS - set(reviews_columns)
+    for row in rows:
+        dropped = missing if row.get("_source") == "reviews" else extras
+        for key in dropped:
+            row.pop(key, None)
+    return rows
+
+
+async def select_reviews_feed(*, status: str | None = None) -> list[dict[str, Any]]:
+    """Merged reviews and testimonials rows in display order, then newest first, as one database query."""
+    schema = await get_schema()
+    built = build_reviews_feed_statement(
+        reviews_columns=schema.columns("reviews"),
+        testimonial_columns=schema.columns("testimonials"),
+        status=status,
+    )
+    if built is None:
+        return []
+    statement, params = built
+    return _trim_rows(await _fetch_statement(statement, params, commit=False), schema.columns("reviews"))
+
+
+async def select_reviews_page(*, limit: int, status: str | None = None, after: str | None = None) -> dict[str, Any]:
+    schema = await get_schema()
+    built = build_reviews_feed_statement(
+        reviews_columns=schema.columns("reviews"),
+        testimonial_columns=schema.columns("testimonials"),
+        status=status,
+        limit=limit,
+        after=after,
+    )
+    if built is None:
+        return build_page([], limit)
+    statement, params = built
+    rows = await _fetch_statement(statement, params, commit=False)
+    return build_page(_trim_rows(rows, schema.columns("reviews")), limit)
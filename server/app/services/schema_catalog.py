@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from server.app.config import settings
+from server.app.services.async_database import fetch_all
+
+SCHEMA_COLUMNS_QUERY = """
+select
+  table_name,
+  column_name,
+  data_type,
+  is_nullable = 'YES' as is_nullable,
+  column_default
+from information_schema.columns
+where table_schema = 'public'
+order by table_name, ordinal_position
+"""
+
+
+@dataclass(frozen=True)
+class ColumnInfo:
+    name: str
+    data_type: str
+    is_nullable: bool
+    default: str | None
+
+
+@dataclass(frozen=True)
+class SchemaSnapshot:
+    tables: dict[str, dict[str, ColumnInfo]]
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    def has_table(self, table_name: str) -> bool:
+        return table_name in self.tables
+
+    def columns(self, table_name: str) -> frozenset[str]:
+        return frozenset(self.tables.get(table_name, ()))
+
+    def describe(self) -> dict[str, Any]:
+        return {
+            "tables": {name: list(columns) for name, columns in self.tables.items()},
+            "age_seconds": round(time.monotonic() - self.loaded_at, 3),
+        }
+
+
+_snapshot: SchemaSnapshot | None = None
+_snapshot_lock: asyncio.Lock | None = None
+
+
+def _is_fresh(snapshot: SchemaSnapshot | None) -> bool:
+    return snapshot is not None and time.monotonic() - snapshot.loaded_at < settings.schema_cache_ttl_seconds
+
+
+async def _load_snapshot() -> SchemaSnapshot:
+    tables: dict[str, dict[str, ColumnInfo]] = {}
+    for row in await fetch_all(SCHEMA_COLUMNS_QUERY):
+        tables.setdefault(row["table_name"], {})[row["column_name"]] = ColumnInfo(
+            name=row["column_name"],
+            data_type=row["data_type"],
+            is_nullable=bool(row["is_nullable"]),
+            default=row["column_default"],
+        )
+    return SchemaSnapshot(tables=tables)
+
+
+async def get_schema() -> SchemaSnapshot:
+    """Return the cached ``public`` schema, reloading it in one query once the TTL lapses."""
+    global _snapshot, _snapshot_lock
+    if _is_fresh(_snapshot):
+        return _snapshot
+
+    if _snapshot_lock is None:
+        _snapshot_lock = asyncio.Lock()
+    async with _snapshot_lock:
+        if not _is_fresh(_snapshot):
+            _snapshot = await _load_snapshot()
+        return _snapshot
+
+
+def invalidate_schema() -> None:
+    global _snapshot
+    _snapshot = None
+
+
+async def refresh_schema() -> SchemaSnapshot:
+    invalidate_schema()
+    return await get_schema()
+
+
+async def table_exists(table_name: str) -> bool:
+    return (await get_schema()).has_table(table_name)
+
+
+async def table_columns(table_name: str) -> frozenset[str]:
+    return (await get_schema()).columns(table_name)
@@ -1,41 +1,70 @@
 import asyncio
 # Force reload for env update
-import base64
 import hashlib
-import hmac
 import json
 import os
 import re
 import time
-import smtplib
-from difflib import SequenceMatcher
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from typing import Any, Optional
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any, AsyncIterator, Awaitable, Callable, Collection, Literal, Optional
 
 import httpx
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, Request, UploadFile, File
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, ValidationError, create_model
 
 from server.app.config import settings
 from server.app.routes.auth_webhooks import router as auth_webhooks_router
-from server.app.services.database import (
-    count_records,
+from server.app.routes.media import router as media_router
+from server.app.security.metrics import verify_metrics_request
+from server.app.security.tokens import HS256Key, ParsedJWT, parse_hs256_jwt
+from server.app.services import async_database
+from server.app.services.cache import TTLCache
+from server.app.services.chat_prompt import PromptSource, estimate_messages_tokens, trim_history_to_budget
+from server.app.services.email.outbox import (
+    OutboundEmail,
+    enqueue_emails,
+    outbox_enabled,
+    register_transport,
+    send_now,
+    start_outbox_worker,
+    stop_outbox_worker,
+)
+from server.app.services.email.pool import SMTPServerConfig, close_smtp_pools
+from server.app.services.fact_index import FactIndex
+from server.app.services.async_database import (
+    RecordWrite,
+    apply_writes,
+    count_records_by_status,
     delete_record_by_id,
     fetch_all,
-    fetch_one,
     insert_record,
-    is_database_configured,
+    select_page,
     select_records,
-    table_exists,
     update_record_by_id,
 )
+from server.app.services.database import close_pool, decode_cursor, is_database_configured, pool_stats
+from server.app.services.http_cache import conditional_json_response, render_json
+from server.app.services.http_client import close_http_client, get_http_client
 from server.app.services.media_storage import (
     ensure_media_bucket,
     normalize_object_path,
-    store_uploaded_file,
+    UploadTooLargeError,
+    store_uploaded_stream,
+)
+from server.app.services.media_variants import close_variant_workers, schedule_variants
+from server.app.services.metrics import PROMETHEUS_CONTENT_TYPE, MetricsMiddleware, render_metrics, span
+from server.app.services.reviews_feed import select_reviews_feed, select_reviews_page
+from server.app.services.schema_catalog import (
+    SchemaSnapshot,
+    get_schema,
+    invalidate_schema,
+    refresh_schema,
+    table_columns,
+    table_exists,
 )
 
 load_dotenv()
@@ -46,8 +75,27 @@ ADMIN_USERNAME = os.getenv("ADMIN_USERNAME", "")
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "")
 ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
 USER_AUTH_TOKEN = os.getenv("USER_AUTH_TOKEN", "") or ADMIN_TOKEN
+ADMIN_JWT_KEY = HS256Key(ADMIN_TOKEN)
+USER_JWT_KEY = ADMIN_JWT_KEY if USER_AUTH_TOKEN == ADMIN_TOKEN else HS256Key(USER_AUTH_TOKEN)
+MAX_PAGE_SIZE = 100
+MAX_BATCH_OPERATIONS = 200
+LIST_METADATA_FIELDS = frozenset({"id", "created_at", "updated_at", "display_order"})
+
 
-app = FastAPI(title="DrawnDimension Chat API")
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    get_http_client()
+    start_outbox_worker()
+    yield
+    await stop_outbox_worker()
+    await close_http_client()
+    await async_database.close_pool()
+    await asyncio.to_thread(close_pool)
+    await asyncio.to_thread(close_variant_workers)
+    await asyncio.to_thread(close_smtp_pools)
+
+
+app = FastAPI(title="DrawnDimension Chat API", lifespan=lifespan)
 
 origins = os.getenv("CORS_ORIGINS", "http://localhost:8080,http://127.0.0.1:8080").split(",")
 app.add_middleware(
@@ -58,7 +106,73 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
 app.include_router(auth_webhooks_router)
+app.include_router(media_router)
+
+cms_cache = TTLCache(
+    ttl_seconds=settings.cms_cache_ttl_seconds,
+    max_entries=settings.cms_cache_max_entries,
+)
+chat_cache = TTLCache(
+    ttl_seconds=settings.chat_cache_ttl_seconds,
+    max_entries=settings.chat_cache_max_entries,
+)
+auth_cache = TTLCache(
+    ttl_seconds=settings.auth_cache_ttl_seconds,
+    max_entries=settings.auth_cache_max_entries,
+)
+
+
+# --- Helper to Verify Auth ---
+def _authenticate_jwt(token: ParsedJWT) -> dict[str, Any] | None:
+    admin_payload = ADMIN_JWT_KEY.verify(token)
+    if admin_payload and str(admin_payload.get("username") or "").strip():
+        return {"admin": True, **admin_payload}
+
+    site_payload = admin_payload if USER_JWT_KEY is ADMIN_JWT_KEY else USER_JWT_KEY.verify(token)
+    if site_payload and str(site_payload.get("scope") or "").strip().lower() == "site_user":
+        return site_payload
+    return None
+
+
+def get_user(request: Request):
+    auth_header = request.headers.get("Authorization")
+    if not auth_header or not auth_header.startswith("Bearer "):
+         raise HTTPException(status_code=401, detail="Missing or invalid token")
+    token = auth_header.split(" ")[1]
+
+    if ADMIN_TOKEN and token == ADMIN_TOKEN:
+        return {"admin": True}
+
+    cached = auth_cache.get(("bearer", token))
+    if cached is not None:
+        return dict(cached)
+
+    parsed = parse_hs256_jwt(token)
+    user = _authenticate_jwt(parsed) if parsed else None
+    if user is None:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    # The cache entry must not outlive the token itself.
+    expires_at = parsed.expires_at
+    auth_cache.set(("bearer", token), user, ttl_seconds=None if expires_at is None else expires_at - time.time())
+    return dict(user)
+
+
+async def require_user(request: Request) -> dict[str, Any]:
+    """get_user as a dependency; async so FastAPI runs it on the loop rather than a worker thread."""
+    return get_user(request)
+
+
+async def require_admin(user: dict[str, Any] = Depends(require_user)) -> dict[str, Any]:
+    """require_user narrowed to admin principals; site_user tokens get a 403."""
+    if not user.get("admin"):
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return user
+
 
 _model_cache: dict[str, Any] = {"value": None, "ts": 0}
 
@@ -123,6 +237,21 @@ class Review(BaseModel):
     status: Optional[str] = "draft"
 
 
+class BatchOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: Optional[str] = None
+    data: dict[str, Any] = Field(default_factory=dict)
+
+
+class BatchRequest(BaseModel):
+    operations: list[BatchOperation] = Field(..., min_length=1, max_length=MAX_BATCH_OPERATIONS)
+
+
+class ReorderRequest(BaseModel):
+    # Validated by _ordered_ids so errors match the Node API's messages.
+    orderedIds: Any = None
+
+
 def _is_live_review_row(row: dict[str, Any]) -> bool:
     is_published = row.get("is_published")
     if isinstance(is_published, bool):
@@ -156,47 +285,47 @@ def _map_testimonial_to_review(row: dict[str, Any]) -> dict[str, Any]:
     }
 
 
-def _build_testimonial_update_data(data: dict[str, Any], existing_row: dict[str, Any]) -> dict[str, Any]:
+def _build_testimonial_update_data(data: dict[str, Any], existing_columns: Collection[str]) -> dict[str, Any]:
     mapped: dict[str, Any] = {}
 
-    if "name" in data and "name" in existing_row:
+    if "name" in data and "name" in existing_columns:
         mapped["name"] = data["name"]
-    if "role" in data and "role" in existing_row:
+    if "role" in data and "role" in existing_columns:
         mapped["role"] = data["role"]
-    if "company" in data and "company" in existing_row:
+    if "company" in data and "company" in existing_columns:
         mapped["company"] = data["company"]
-    if "country" in data and "country" in existing_row:
+    if "country" in data and "country" in existing_columns:
         mapped["country"] = data["country"]
 
     if "content" in data:
-        if "content" in existing_row:
+        if "content" in existing_columns:
             mapped["content"] = data["content"]
-        elif "review" in existing_row:
+        elif "review" in existing_columns:
             mapped["review"] = data["content"]
 
     if "rating" in data:
-        if "rating" in existing_row:
+        if "rating" in existing_columns:
             mapped["rating"] = data["rating"]
-        elif "stars" in existing_row:
+        elif "stars" in existing_columns:
             mapped["stars"] = data["rating"]
 
     if "image_url" in data:
-        if "image_url" in existing_row:
+        if "image_url" in existing_columns:
             mapped["image_url"] = data["image_url"]
-        elif "avatar_url" in existing_row:
+        elif "avatar_url" in existing_columns:
             mapped["avatar_url"] = data["image_url"]
 
     if "project" in data:
-        if "service_tag" in existing_row:
+        if "service_tag" in existing_columns:
             mapped["service_tag"] = data["project"]
-        elif "project" in existing_row:
+        elif "project" in existing_columns:
             mapped["project"] = data["project"]
 
     if "status" in data:
         is_live = str(data.get("status") or "").lower() == "live"
-        if "is_published" in existing_row:
+        if "is_published" in existing_columns:
             mapped["is_published"] = is_live
-        elif "status" in existing_row:
+        elif "status" in existing_columns:
             mapped["status"] = "live" if is_live else "draft"
 
     return mapped
@@ -258,6 +387,24 @@ def _build_testimonial_insert_variants(data: dict[str, Any]) -> list[dict[str, A
     return cleaned
 
 
+def _choose_review_insert(
+    data: dict[str, Any],
+    reviews_columns: Collection[str],
+    testimonial_columns: Collection[str],
+) -> tuple[str, dict[str, Any]] | None:
+    if reviews_columns and set(data) <= set(reviews_columns):
+        return "reviews", data
+
+    if not testimonial_columns:
+        return None
+    for payload in _build_testimonial_insert_variants(data):
+        if set(payload) <= set(testimonial_columns):
+            return "testimonials", payload
+    # Mixed legacy shapes (e.g. "review" with "rating") fit none of the variants; map field by field.
+    mapped = _build_testimonial_update_data(data, testimonial_columns)
+    return ("testimonials", mapped) if mapped else None
+
+
 class AdminResolveRequest(BaseModel):
     username: str
 
@@ -275,10 +422,11 @@ def normalize_model_name(model_name: str) -> str:
 
 async def list_models(api_key: str) -> list[str]:
     url = "https://api.groq.com/openai/v1/models"
-    async with httpx.AsyncClient(timeout=20) as client:
-        response = await client.get(
+    with span("groq.models"):
+        response = await get_http_client().get(
             url,
             headers={"Authorization": f"Bearer {api_key}"},
+            timeout=20,
         )
 
     if response.status_code >= 400:
@@ -334,11 +482,6 @@ def _normalize_lookup_text(text: str) -> str:
     return " ".join(cleaned.split())
 
 
-def _tokenize_lookup_text(text: str) -> tuple[str, ...]:
-    normalized = _normalize_lookup_text(text)
-    return tuple(token for token in normalized.split() if token)
-
-
 COMPANY_FACT_LOOKUP: tuple[dict[str, Any], ...] = (
     {
         "id": "ceo",
@@ -702,58 +845,20 @@ COMPANY_FACT_LOOKUP: tuple[dict[str, Any], ...] = (
 )
 
 
-def _score_lookup_keyword(normalized_query: str, query_tokens: tuple[str, ...], keyword: str) -> float:
-    normalized_keyword = _normalize_lookup_text(keyword)
-    if not normalized_keyword:
-        return 0.0
-
-    if normalized_keyword in normalized_query:
-        return 7.0 + float(len(normalized_keyword.split()))
-
-    keyword_tokens = normalized_keyword.split()
-    if not keyword_tokens:
-        return 0.0
-
-    match_score = 0.0
-    for keyword_token in keyword_tokens:
-        if keyword_token in query_tokens:
-            match_score += 1.0
-            continue
-
-        if len(keyword_token) < 4:
-            continue
-
-        for query_token in query_tokens:
-            if len(query_token) < 4:
-                continue
-            if SequenceMatcher(None, keyword_token, query_token).ratio() >= 0.88:
-                match_score += 0.7
-                break
-
-    required_score = 1.0 if len(keyword_tokens) == 1 else max(1.6, len(keyword_tokens) * 0.7)
-    if match_score >= required_score:
-        return match_score * 2.5
-
-    return 0.0
+COMPANY_FACT_INDEX = FactIndex(COMPANY_FACT_LOOKUP, normalize=_normalize_lookup_text)
 
 
 def _match_company_facts(message: str) -> list[dict[str, Any]]:
     normalized_query = _normalize_lookup_text(message)
-    query_tokens = _tokenize_lookup_text(message)
+    query_tokens = tuple(normalized_query.split())
     if not normalized_query or not query_tokens:
         return []
 
-    matches: list[dict[str, Any]] = []
-    for item in COMPANY_FACT_LOOKUP:
-        best_score = max(
-            (_score_lookup_keyword(normalized_query, query_tokens, keyword) for keyword in item["keywords"]),
-            default=0.0,
-        )
-        if best_score >= float(item.get("threshold", 4.0)):
-            matches.append({"score": best_score, "item": item})
-
-    matches.sort(key=lambda entry: entry["score"], reverse=True)
-    return matches
+    with span("chat.fact_match"):
+        return [
+            {"score": score, "item": item}
+            for score, item in COMPANY_FACT_INDEX.match(normalized_query, query_tokens)
+        ]
 
 
 def build_relevant_company_context(message: str, limit: int = 4) -> str:
@@ -799,30 +904,123 @@ def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/api/health/database")
+def database_health() -> dict[str, Any]:
+    return {
+        "configured": is_database_configured(),
+        "pool": pool_stats(),
+        "async_pool": async_database.pool_stats(),
+    }
+
+
+@app.post("/api/admin/schema/refresh", dependencies=[Depends(require_admin)])
+async def refresh_schema_catalog() -> dict[str, Any]:
+    _require_database()
+    snapshot = await refresh_schema()
+    return snapshot.describe()
+
+
+@app.get("/api/metrics")
+async def prometheus_metrics(request: Request) -> Response:
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    verify_metrics_request(request, settings.metrics_token)
+    return Response(render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@app.get("/api/health/cache")
+def cache_health() -> dict[str, Any]:
+    return {"cms": cms_cache.stats(), "chat": chat_cache.stats(), "auth": auth_cache.stats()}
+
+
+# Room for multipart boundaries and part headers on top of the file itself.
+UPLOAD_ENVELOPE_BYTES = 64 * 1024
+
+
+def _upload_too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"File exceeds the {max_bytes} byte upload limit")
+
+
+async def _read_upload_form(request: Request, max_bytes: int):
+    """Parse the multipart body, refusing oversized uploads before they are spooled in full."""
+    if not max_bytes:
+        return await request.form()
+
+    limit = max_bytes + UPLOAD_ENVELOPE_BYTES
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > limit:
+        raise _upload_too_large(max_bytes)
+
+    # Chunked bodies carry no length, so count bytes as they arrive instead.
+    received = 0
+
+    async def receive():
+        nonlocal received
+        message = await request.receive()
+        if message["type"] == "http.request":
+            received += len(message.get("body", b""))
+            if received > limit:
+                raise _upload_too_large(max_bytes)
+        return message
+
+    return await Request(request.scope, receive).form()
+
+
 @app.post("/api/upload")
-async def upload_file(file: UploadFile = File(...), request: Request = None):
+async def upload_file(request: Request):
     # Verify auth if request is provided (optional for public uploads if needed, but safer with auth)
     # create_project passes request, so we can verify. Frontend must send token.
-    if request:
-        try:
-            get_user(request)
-        except Exception:
-            pass
+    try:
+        get_user(request)
+    except Exception:
+        pass
+
+    max_bytes = settings.max_upload_bytes
+    form = await _read_upload_form(request, max_bytes)
+    file = form.get("file")
+    if file is None or isinstance(file, str):
+        await form.close()
+        raise HTTPException(status_code=400, detail="A file field is required")
+    if max_bytes and file.size is not None and file.size > max_bytes:
+        await form.close()
+        raise _upload_too_large(max_bytes)
 
     try:
-        file_content = await file.read()
         ext = re.sub(r"[^A-Za-z0-9]", "", (os.path.splitext(file.filename or "")[1].lstrip("."))) or "bin"
         filename = normalize_object_path(f"misc/{int(time.time())}_{file.filename}", ext)
+        # Copy the spooled upload to disk in chunks on a worker thread instead of reading it into memory.
         saved = await asyncio.to_thread(
-            store_uploaded_file,
-            buffer=file_content,
+            store_uploaded_stream,
+            source=file.file,
             object_path=filename,
             bucket_name=CMS_BUCKET,
+            max_bytes=max_bytes,
+        )
+        # Variant URLs are deterministic, so they are returned now and filled in by the worker pool.
+        variants = await asyncio.to_thread(
+            schedule_variants,
+            absolute_path=saved["absolute_path"],
+            object_path=saved["path"],
+            sha256=saved["sha256"],
+            bucket_name=CMS_BUCKET,
         )
-        return {"url": saved["public_url"]}
+        return {
+            "url": saved["public_url"],
+            "size": saved["size"],
+            "sha256": saved["sha256"],
+            "deduplicated": saved["deduplicated"],
+            "variants": [
+                {"width": variant["width"], "format": variant["format"], "url": variant["url"]}
+                for variant in variants
+            ],
+        }
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         print(f"Upload error: {e}")
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+    finally:
+        await form.close()
 
 
 @app.post("/api/admin/login")
@@ -846,8 +1044,7 @@ async def resolve_admin_email(payload: AdminResolveRequest) -> dict[str, str]:
     if "@" in username:
         return {"email": username}
     try:
-        rows = await asyncio.to_thread(
-            fetch_all,
+        rows = await fetch_all(
             """
             select email
             from public.profiles
@@ -878,122 +1075,121 @@ async def models() -> dict[str, Any]:
     return {"models": names}
 
 
-@app.post("/api/chat")
-async def chat(payload: ChatRequest) -> dict[str, str]:
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key:
-        raise HTTPException(status_code=500, detail="Missing GROQ_API_KEY")
-
-    model = os.getenv("GROQ_MODEL") or "llama-3.3-70b-versatile"
+GROQ_CHAT_COMPLETIONS_URL = "https://api.groq.com/openai/v1/chat/completions"
+RETRYABLE_MODEL_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+EMPTY_REPLY_FALLBACK = "I couldn't generate a response right now."
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+PROMPT_TOKENS_HEADER = "X-Prompt-Tokens-Estimate"
+
+
+CHAT_COMPANY_KNOWLEDGE = (
+    "Company identity:\n"
+    "- Brand: Drawn Dimension\n"
+    "- Positioning: Premium engineering, design, and digital solutions company\n"
+    "- Started in: 2022\n"
+    "- Origin story: Started with web design in 2022 and expanded into engineering, 3D, and product-focused work based on client needs\n"
+    "- Delivery focus: clean execution, accurate technical detail, and client-ready handover\n"
+    "- Global service: The company works with clients worldwide from Dhaka, Bangladesh\n\n"
+    "Official contact info:\n"
+    "- Email: drawndimensioninfo@gmail.com\n"
+    "- Response time: usually within 24 hours\n"
+    "- WhatsApp: +880 1775-119416\n"
+    "- WhatsApp link: https://wa.me/8801775119416\n"
+    "- Location: Dhaka, Bangladesh\n"
+    "- Business hours: 9:00 AM - 6:00 PM, Sunday to Thursday\n\n"
+    "Website pages and navigation:\n"
+    "- Home: /\n"
+    "- About: /about\n"
+    "- Services: /services\n"
+    "- Our Works / Portfolio: /portfolio\n"
+    "- Products: /products\n"
+    "- Reviews: /testimonials\n"
+    "- FAQ: /faq\n"
+    "- Contact: /contact\n"
+    "- Dashboard: /dashboard\n\n"
+    "Company timeline and milestones:\n"
+    "- 2022: Started with modern web design services\n"
+    "- 2024: Added graphic design, PFD, P&ID, and AutoCAD technical drawing services\n"
+    "- 2025: Added 3D SolidWorks workflows\n"
+    "- 2025: Started building and selling small tools\n"
+    "- Today: Focused on clean, accurate, premium project delivery\n\n"
+    "Core services:\n"
+    "- Web Design & Development\n"
+    "- Graphic Design & Branding\n"
+    "- Process Flow Diagram (PFD)\n"
+    "- Piping and Instrumentation Diagram (P&ID)\n"
+    "- AutoCAD Technical Drawing\n"
+    "- 3D SolidWorks Modeling\n"
+    "- HAZOP Study & Risk Analysis\n"
+    "- Small tools development and sales\n\n"
+    "What the company does:\n"
+    "- Builds clean, responsive websites focused on communication and conversion\n"
+    "- Creates brand-focused graphic design assets\n"
+    "- Produces accurate technical drawings and documentation for practical execution\n"
+    "- Develops detailed 3D models for validation, clarity, and planning\n"
+    "- Builds and sells practical small tools with reliability and value in mind\n\n"
+    "Mission, vision, and values:\n"
+    "- Mission: Submit every client project with clean execution, accurate technical detail, and dependable quality from concept to final delivery\n"
+    "- Vision: Be a trusted leader in integrated engineering and creative services, known for precision, reliability, and long-term client success\n"
+    "- Core values: Precision, Innovation, Collaboration, Excellence\n\n"
+    "Leadership team:\n"
+    "- Faisal Piyash: Chief Executive Officer (CEO)\n"
+    "- Muhammad Muntasir Mahamud: Chief Technical Officer (CTO)\n"
+    "- Mafruza Khanam Prottassha: Chief Marketing Officer (CMO)\n\n"
+    "Employee team:\n"
+    "- Sohel Rana: Process Engineer\n"
+    "- Abidur Rahman: Mechanical Engineer\n"
+    "- Md. Ashadu Hinu Sabbir: Graphics Design\n"
+    "- Alif Anam: Web Design\n"
+    "- Monir sahriyar: Process Engineer\n\n"
+    "Helpful FAQ facts:\n"
+    "- The company provides web design, graphic design, PFD/P&ID, AutoCAD drawing, SolidWorks 3D modeling, and small tools development and sales\n"
+    "- The team started in 2022 and expanded into engineering and product-focused services from 2024 onward\n"
+    "- The company delivers client-ready files and practical project handover\n"
+    "- Clients can discuss requirements, scope, timeline, and delivery format through the contact page or WhatsApp before starting\n\n"
+    "Products and categories:\n"
+    "- Main product focus: ready-to-use digital solutions and tools\n"
+    "- Website product categories: WordPress Website, E-commerce Website, Portfolio Website, Realstate Website, Python Tools\n"
+    "- Products page: /products\n"
+)
 
-    fact_reply = get_company_fact_reply(payload.message)
-    if fact_reply:
-        return {"reply": fact_reply}
+DEFAULT_CHAT_SYSTEM_PROMPT = (
+    "You are NEMO AI assistant of Drawn Dimension.\n\n"
+    "Primary goal:\n"
+    "- Give professional, accurate, and helpful replies about the company, services, products, and contact process.\n\n"
+    "Language rules:\n"
+    "- If user writes Bangla, reply in Bangla.\n"
+    "- If user writes English, reply in English.\n"
+    "- If user mixes both, use the dominant language naturally.\n\n"
+    "Tone and style:\n"
+    "- Professional, respectful, concise, and human.\n"
+    "- No slang and no decorative emoji.\n"
+    "- Use short paragraphs or bullet points for clarity.\n"
+    "- End with one clear next-step question when useful.\n\n"
+    "Company knowledge to use:\n"
+    f"{CHAT_COMPANY_KNOWLEDGE}\n"
+    "Behavior instructions:\n"
+    "- Before answering, check whether the question is about leadership, contact info, location, business hours, services, history, mission, team, products, or portfolio.\n"
+    "- If the answer exists in the company knowledge or relevant company context, answer directly and never say the information is unavailable.\n"
+    "- If user asks about the company, summarize the company identity, story, timeline, and delivery focus from the knowledge above.\n"
+    "- If user asks about services, list the relevant services and briefly explain the best fit.\n"
+    "- If user asks about products, explain the product focus and categories, then direct them to /products.\n"
+    "- If user asks about contact info, provide email, WhatsApp, location, business hours, response time, and /contact.\n"
+    "- If user asks about the CEO, CTO, CMO, leadership, or employees, provide the exact names and roles from the knowledge block.\n"
+    "- If user asks about mission, vision, values, or company history, answer from the knowledge block in a concise way.\n"
+    "- If user asks to see previous work or examples, provide /portfolio.\n"
+    "- If user asks for reviews or testimonials, provide /testimonials.\n"
+    "- If user asks something unknown, say you can connect them to the human team via email or WhatsApp.\n"
+    "- Never invent pricing, exact delivery promises, addresses, names, or capabilities that are not in the knowledge block.\n"
+)
 
-    relevant_company_context = build_relevant_company_context(payload.message)
+chat_system_prompt = PromptSource(DEFAULT_CHAT_SYSTEM_PROMPT, settings.chat_system_prompt_path)
 
-    company_knowledge = (
-        "Company identity:\n"
-        "- Brand: Drawn Dimension\n"
-        "- Positioning: Premium engineering, design, and digital solutions company\n"
-        "- Started in: 2022\n"
-        "- Origin story: Started with web design in 2022 and expanded into engineering, 3D, and product-focused work based on client needs\n"
-        "- Delivery focus: clean execution, accurate technical detail, and client-ready handover\n"
-        "- Global service: The company works with clients worldwide from Dhaka, Bangladesh\n\n"
-        "Official contact info:\n"
-        "- Email: drawndimensioninfo@gmail.com\n"
-        "- Response time: usually within 24 hours\n"
-        "- WhatsApp: +880 1775-119416\n"
-        "- WhatsApp link: https://wa.me/8801775119416\n"
-        "- Location: Dhaka, Bangladesh\n"
-        "- Business hours: 9:00 AM - 6:00 PM, Sunday to Thursday\n\n"
-        "Website pages and navigation:\n"
-        "- Home: /\n"
-        "- About: /about\n"
-        "- Services: /services\n"
-        "- Our Works / Portfolio: /portfolio\n"
-        "- Products: /products\n"
-        "- Reviews: /testimonials\n"
-        "- FAQ: /faq\n"
-        "- Contact: /contact\n"
-        "- Dashboard: /dashboard\n\n"
-        "Company timeline and milestones:\n"
-        "- 2022: Started with modern web design services\n"
-        "- 2024: Added graphic design, PFD, P&ID, and AutoCAD technical drawing services\n"
-        "- 2025: Added 3D SolidWorks workflows\n"
-        "- 2025: Started building and selling small tools\n"
-        "- Today: Focused on clean, accurate, premium project delivery\n\n"
-        "Core services:\n"
-        "- Web Design & Development\n"
-        "- Graphic Design & Branding\n"
-        "- Process Flow Diagram (PFD)\n"
-        "- Piping and Instrumentation Diagram (P&ID)\n"
-        "- AutoCAD Technical Drawing\n"
-        "- 3D SolidWorks Modeling\n"
-        "- HAZOP Study & Risk Analysis\n"
-        "- Small tools development and sales\n\n"
-        "What the company does:\n"
-        "- Builds clean, responsive websites focused on communication and conversion\n"
-        "- Creates brand-focused graphic design assets\n"
-        "- Produces accurate technical drawings and documentation for practical execution\n"
-        "- Develops detailed 3D models for validation, clarity, and planning\n"
-        "- Builds and sells practical small tools with reliability and value in mind\n\n"
-        "Mission, vision, and values:\n"
-        "- Mission: Submit every client project with clean execution, accurate technical detail, and dependable quality from concept to final delivery\n"
-        "- Vision: Be a trusted leader in integrated engineering and creative services, known for precision, reliability, and long-term client success\n"
-        "- Core values: Precision, Innovation, Collaboration, Excellence\n\n"
-        "Leadership team:\n"
-        "- Faisal Piyash: Chief Executive Officer (CEO)\n"
-        "- Muhammad Muntasir Mahamud: Chief Technical Officer (CTO)\n"
-        "- Mafruza Khanam Prottassha: Chief Marketing Officer (CMO)\n\n"
-        "Employee team:\n"
-        "- Sohel Rana: Process Engineer\n"
-        "- Abidur Rahman: Mechanical Engineer\n"
-        "- Md. Ashadu Hinu Sabbir: Graphics Design\n"
-        "- Alif Anam: Web Design\n"
-        "- Monir sahriyar: Process Engineer\n\n"
-        "Helpful FAQ facts:\n"
-        "- The company provides web design, graphic design, PFD/P&ID, AutoCAD drawing, SolidWorks 3D modeling, and small tools development and sales\n"
-        "- The team started in 2022 and expanded into engineering and product-focused services from 2024 onward\n"
-        "- The company delivers client-ready files and practical project handover\n"
-        "- Clients can discuss requirements, scope, timeline, and delivery format through the contact page or WhatsApp before starting\n\n"
-        "Products and categories:\n"
-        "- Main product focus: ready-to-use digital solutions and tools\n"
-        "- Website product categories: WordPress Website, E-commerce Website, Portfolio Website, Realstate Website, Python Tools\n"
-        "- Products page: /products\n"
-    )
 
-    system_prompt = (
-        "You are NEMO AI assistant of Drawn Dimension.\n\n"
-        "Primary goal:\n"
-        "- Give professional, accurate, and helpful replies about the company, services, products, and contact process.\n\n"
-        "Language rules:\n"
-        "- If user writes Bangla, reply in Bangla.\n"
-        "- If user writes English, reply in English.\n"
-        "- If user mixes both, use the dominant language naturally.\n\n"
-        "Tone and style:\n"
-        "- Professional, respectful, concise, and human.\n"
-        "- No slang and no decorative emoji.\n"
-        "- Use short paragraphs or bullet points for clarity.\n"
-        "- End with one clear next-step question when useful.\n\n"
-        "Company knowledge to use:\n"
-        f"{company_knowledge}\n"
-        "Behavior instructions:\n"
-        "- Before answering, check whether the question is about leadership, contact info, location, business hours, services, history, mission, team, products, or portfolio.\n"
-        "- If the answer exists in the company knowledge or relevant company context, answer directly and never say the information is unavailable.\n"
-        "- If user asks about the company, summarize the company identity, story, timeline, and delivery focus from the knowledge above.\n"
-        "- If user asks about services, list the relevant services and briefly explain the best fit.\n"
-        "- If user asks about products, explain the product focus and categories, then direct them to /products.\n"
-        "- If user asks about contact info, provide email, WhatsApp, location, business hours, response time, and /contact.\n"
-        "- If user asks about the CEO, CTO, CMO, leadership, or employees, provide the exact names and roles from the knowledge block.\n"
-        "- If user asks about mission, vision, values, or company history, answer from the knowledge block in a concise way.\n"
-        "- If user asks to see previous work or examples, provide /portfolio.\n"
-        "- If user asks for reviews or testimonials, provide /testimonials.\n"
-        "- If user asks something unknown, say you can connect them to the human team via email or WhatsApp.\n"
-        "- Never invent pricing, exact delivery promises, addresses, names, or capabilities that are not in the knowledge block.\n"
-    )
+def _build_chat_messages(payload: ChatRequest) -> list[dict[str, str]]:
+    relevant_company_context = build_relevant_company_context(payload.message)
 
-    messages = [{"role": "system", "content": system_prompt}]
+    messages = [{"role": "system", "content": chat_system_prompt.get()}]
     if relevant_company_context:
         messages.append(
             {
@@ -1005,26 +1201,66 @@ async def chat(payload: ChatRequest) -> dict[str, str]:
                 ),
             }
         )
-    
-    # Add history
-    for message in payload.history:
-        messages.append({"role": message.role, "content": message.content})
-    
-    # Add current user message
-    messages.append({"role": "user", "content": payload.message})
-
-    body = {
+
+    user_message = {"role": "user", "content": payload.message}
+    # Keep the newest history turns that fit the prompt token budget.
+    history = trim_history_to_budget(
+        fixed_messages=[*messages, user_message],
+        history=[{"role": message.role, "content": message.content} for message in payload.history],
+        max_tokens=settings.chat_max_prompt_tokens,
+    )
+    messages.extend(history)
+    messages.append(user_message)
+    return messages
+
+
+def _chat_completion_body(payload: ChatRequest, model: str, *, stream: bool = False) -> dict[str, Any]:
+    body: dict[str, Any] = {
         "model": model,
-        "messages": messages,
+        "messages": _build_chat_messages(payload),
         "temperature": 0.2,
         "max_tokens": 1024,
     }
+    if stream:
+        body["stream"] = True
+    return body
+
+
+def _chat_cache_key(payload: ChatRequest, body: dict[str, Any]) -> tuple[str, ...] | None:
+    if payload.history and not settings.chat_cache_with_history:
+        return None
+    normalized_message = _normalize_lookup_text(payload.message)
+    if not normalized_message:
+        return None
+    # Everything except the user's own wording: model, system prompt, matched facts and history.
+    context = json.dumps([body["model"], body["messages"][:-1]], ensure_ascii=False, separators=(",", ":"))
+    return ("chat", normalized_message, hashlib.sha256(context.encode("utf-8")).hexdigest())
+
+
+@app.post("/api/chat")
+async def chat(payload: ChatRequest, response: Response) -> dict[str, str]:
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        raise HTTPException(status_code=500, detail="Missing GROQ_API_KEY")
+
+    model = os.getenv("GROQ_MODEL") or "llama-3.3-70b-versatile"
+
+    fact_reply = get_company_fact_reply(payload.message)
+    if fact_reply:
+        return {"reply": fact_reply}
+
+    body = _chat_completion_body(payload, model)
+    response.headers[PROMPT_TOKENS_HEADER] = str(estimate_messages_tokens(body["messages"]))
+    cache_key = _chat_cache_key(payload, body)
+    if cache_key:
+        cached_reply = chat_cache.get(cache_key)
+        if cached_reply:
+            return {"reply": cached_reply}
 
     async def call_model(model_name: str) -> httpx.Response:
-        url = "https://api.groq.com/openai/v1/chat/completions"
-        async with httpx.AsyncClient(timeout=30) as client:
-            return await client.post(
-                url,
+        with span("groq.chat"):
+            return await get_http_client().post(
+                GROQ_CHAT_COMPLETIONS_URL,
                 headers={"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"},
                 json=body,
             )
@@ -1033,37 +1269,142 @@ async def chat(payload: ChatRequest) -> dict[str, str]:
         last_response: httpx.Response | None = None
         for attempt in range(3):
             try:
-                response = await call_model(model_name)
+                upstream = await call_model(model_name)
             except httpx.RequestError as exc:
                 if attempt < 2:
                     await asyncio.sleep(0.5 * (attempt + 1))
                     continue
                 raise HTTPException(status_code=503, detail=f"Network error: {exc}") from exc
 
-            last_response = response
-            if response.status_code in {429, 500, 502, 503, 504} and attempt < 2:
+            last_response = upstream
+            if upstream.status_code in RETRYABLE_MODEL_STATUS_CODES and attempt < 2:
                 await asyncio.sleep(0.5 * (attempt + 1))
                 continue
-            return response
+            return upstream
 
         return last_response or await call_model(model_name)
 
-    response = await call_model_with_retry(model)
+    upstream = await call_model_with_retry(model)
 
-    if response.status_code >= 400:
-        detail = response.text[:500]
-        print(f"Groq API error {response.status_code}: {detail}")
-        raise HTTPException(status_code=502, detail=f"AI API error {response.status_code}: {detail}")
+    if upstream.status_code >= 400:
+        detail = upstream.text[:500]
+        print(f"Groq API error {upstream.status_code}: {detail}")
+        raise HTTPException(status_code=502, detail=f"AI API error {upstream.status_code}: {detail}")
 
-    data = response.json()
+    data = upstream.json()
     reply = data["choices"][0]["message"]["content"]
 
     if not reply:
-        reply = "I couldn't generate a response right now."
+        reply = EMPTY_REPLY_FALLBACK
+    elif cache_key:
+        chat_cache.set(cache_key, reply)
 
     return {"reply": reply}
 
 
+def _sse_event(data: dict[str, Any], event: str | None = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _stream_single_reply(reply: str) -> AsyncIterator[str]:
+    yield _sse_event({"delta": reply})
+    yield _sse_event({"reply": reply}, event="done")
+
+
+def _parse_stream_delta(line: str) -> str | None:
+    if not line.startswith("data:"):
+        return None
+    data = line[5:].strip()
+    if not data or data == "[DONE]":
+        return None
+    try:
+        chunk = json.loads(data)
+    except ValueError:
+        return None
+    choices = chunk.get("choices") or [{}]
+    return (choices[0].get("delta") or {}).get("content") or None
+
+
+async def _stream_model_reply(
+    api_key: str,
+    body: dict[str, Any],
+    cache_key: tuple[str, ...] | None = None,
+) -> AsyncIterator[str]:
+    headers = {"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"}
+    parts: list[str] = []
+    client = get_http_client()
+    for attempt in range(3):
+        try:
+            # Covers the whole upstream exchange, including time the client takes to read each delta.
+            with span("groq.chat_stream"):
+                async with client.stream("POST", GROQ_CHAT_COMPLETIONS_URL, headers=headers, json=body) as response:
+                    if response.status_code in RETRYABLE_MODEL_STATUS_CODES and attempt < 2:
+                        await asyncio.sleep(0.5 * (attempt + 1))
+                        continue
+                    if response.status_code >= 400:
+                        detail = (await response.aread()).decode("utf-8", errors="replace")[:500]
+                        print(f"Groq API error {response.status_code}: {detail}")
+                        yield _sse_event({"detail": f"AI API error {response.status_code}: {detail}"}, event="error")
+                        return
+
+                    async for line in response.aiter_lines():
+                        delta = _parse_stream_delta(line)
+                        if delta:
+                            parts.append(delta)
+                            yield _sse_event({"delta": delta})
+            break
+        except httpx.RequestError as exc:
+            # Only retry while nothing has reached the client yet.
+            if not parts and attempt < 2:
+                await asyncio.sleep(0.5 * (attempt + 1))
+                continue
+            yield _sse_event({"detail": f"Network error: {exc}"}, event="error")
+            return
+
+    reply = "".join(parts)
+    if reply and cache_key:
+        chat_cache.set(cache_key, reply)
+    yield _sse_event({"reply": reply or EMPTY_REPLY_FALLBACK}, event="done")
+
+
+@app.post("/api/chat/stream")
+async def chat_stream(payload: ChatRequest) -> StreamingResponse:
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        raise HTTPException(status_code=500, detail="Missing GROQ_API_KEY")
+
+    model = os.getenv("GROQ_MODEL") or "llama-3.3-70b-versatile"
+
+    fact_reply = get_company_fact_reply(payload.message)
+    if fact_reply:
+        return StreamingResponse(_stream_single_reply(fact_reply), media_type="text/event-stream", headers=SSE_HEADERS)
+
+    body = _chat_completion_body(payload, model, stream=True)
+    cache_key = _chat_cache_key(payload, body)
+    cached_reply = chat_cache.get(cache_key) if cache_key else None
+    if cached_reply:
+        events = _stream_single_reply(cached_reply)
+    else:
+        events = _stream_model_reply(api_key, body, cache_key)
+    headers = {**SSE_HEADERS, PROMPT_TOKENS_HEADER: str(estimate_messages_tokens(body["messages"]))}
+    return StreamingResponse(events, media_type="text/event-stream", headers=headers)
+
+
+def _contact_smtp_config() -> SMTPServerConfig:
+    return SMTPServerConfig(
+        host="smtp.gmail.com",
+        port=587,
+        username=os.getenv("MAIL_USERNAME", ""),
+        password=os.getenv("MAIL_PASSWORD", ""),
+        timeout=settings.smtp_timeout,
+    )
+
+
+CONTACT_TRANSPORT = "contact"
+register_transport(CONTACT_TRANSPORT, _contact_smtp_config)
+
+
 @app.post("/api/contact")
 async def contact(payload: ContactRequest) -> dict[str, str]:
     mail_username = os.getenv("MAIL_USERNAME")
@@ -1072,13 +1413,6 @@ async def contact(payload: ContactRequest) -> dict[str, str]:
     if not mail_username or not mail_password:
         raise HTTPException(status_code=500, detail="Email configuration missing")
 
-    # Construct email
-    msg = MIMEMultipart()
-    msg["From"] = mail_username
-    msg["To"] = mail_username  # Send to self
-    msg["Subject"] = f"New Project Inquiry: {payload.service} - {payload.firstName} {payload.lastName}"
-    msg["Reply-To"] = payload.email
-
     body = f"""
 New Contact Form Submission from DrawnDimension Website
 
@@ -1090,93 +1424,32 @@ Service: {payload.service}
 Details:
 {payload.details}
     """
-    msg.attach(MIMEText(body, "plain"))
+    email = OutboundEmail(
+        transport=CONTACT_TRANSPORT,
+        from_email=mail_username,
+        to_email=mail_username,  # Send to self
+        reply_to=payload.email,
+        subject=f"New Project Inquiry: {payload.service} - {payload.firstName} {payload.lastName}",
+        text_body=body,
+    )
 
     try:
+        if outbox_enabled():
+            await enqueue_emails([email])
+            return {"status": "ok", "message": "Email queued for delivery"}
         # Use asyncio.to_thread for blocking SMTP call
-        await asyncio.to_thread(_send_email_sync, mail_username, mail_password, msg)
+        await asyncio.to_thread(send_now, email)
         return {"status": "ok", "message": "Email sent successfully"}
     except Exception as e:
         print(f"Error sending email: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to send email: {str(e)}")
 
 
-def _send_email_sync(username, password, msg):
-    with smtplib.SMTP("smtp.gmail.com", 587) as server:
-        server.starttls()
-        server.login(username, password)
-        server.send_message(msg)
-
-
-def _decode_base64url_json(segment: str) -> dict[str, Any]:
-    padded = segment + "=" * ((4 - len(segment) % 4) % 4)
-    decoded = base64.urlsafe_b64decode(padded.encode("utf-8"))
-    parsed = json.loads(decoded.decode("utf-8"))
-    return parsed if isinstance(parsed, dict) else {}
-
-
-def _verify_hs256_jwt(token: str, secret: str) -> dict[str, Any] | None:
-    if not token or not secret:
-        return None
-
-    parts = token.split(".")
-    if len(parts) != 3:
-        return None
-
-    header_segment, payload_segment, signature_segment = parts
-    try:
-        header = _decode_base64url_json(header_segment)
-        payload = _decode_base64url_json(payload_segment)
-    except Exception:
-        return None
-
-    if str(header.get("alg") or "").upper() != "HS256":
-        return None
-
-    signed = f"{header_segment}.{payload_segment}".encode("utf-8")
-    expected_signature = base64.urlsafe_b64encode(
-        hmac.new(secret.encode("utf-8"), signed, hashlib.sha256).digest()
-    ).decode("utf-8").rstrip("=")
-
-    if not hmac.compare_digest(expected_signature, signature_segment):
-        return None
-
-    exp = payload.get("exp")
-    if exp is not None:
-        try:
-            if float(exp) <= time.time():
-                return None
-        except Exception:
-            return None
-
-    return payload
-
-
 def _require_database() -> None:
     if not is_database_configured():
         raise HTTPException(status_code=500, detail="DATABASE_URL is not configured")
 
 
-# --- Helper to Verify Auth ---
-def get_user(request: Request):
-    auth_header = request.headers.get("Authorization")
-    if not auth_header or not auth_header.startswith("Bearer "):
-         raise HTTPException(status_code=401, detail="Missing or invalid token")
-    token = auth_header.split(" ")[1]
-
-    if ADMIN_TOKEN and token == ADMIN_TOKEN:
-        return {"admin": True}
-
-    admin_payload = _verify_hs256_jwt(token, ADMIN_TOKEN)
-    if admin_payload and str(admin_payload.get("username") or "").strip():
-        return {"admin": True, **admin_payload}
-
-    site_payload = _verify_hs256_jwt(token, USER_AUTH_TOKEN)
-    if site_payload and str(site_payload.get("scope") or "").strip().lower() == "site_user":
-        return site_payload
-
-    raise HTTPException(status_code=401, detail="Invalid token")
-
 # --- Storage Helpers ---
 def ensure_bucket_exists(bucket_name: str) -> None:
     try:
@@ -1186,49 +1459,239 @@ def ensure_bucket_exists(bucket_name: str) -> None:
 
 
 # --- Dashboard Stats ---
-@app.get("/api/dashboard-stats")
-async def get_dashboard_stats(request: Request):
-    get_user(request)
+DASHBOARD_TABLES = ("projects", "team_members", "products")
+
+
+async def _load_status_counts(tables: tuple[str, ...]) -> dict[str, dict[str, int]]:
+    # Counts are cached per table so the existing write-path invalidation refreshes them,
+    # and every table that is stale is recounted together in one statement.
+    counts: dict[str, dict[str, int]] = {}
+    for table in tables:
+        cached = cms_cache.get((table, "status_counts"))
+        if cached is not None:
+            counts[table] = cached
+
+    missing = tuple(table for table in tables if table not in counts)
+    if missing:
+        generations = {table: cms_cache.generation(table) for table in missing}
+        fresh = await count_records_by_status(missing)
+        for table, table_counts in fresh.items():
+            cms_cache.set((table, "status_counts"), table_counts, generation=generations[table])
+            counts[table] = table_counts
+    return {table: counts[table] for table in tables}
+
+
+@app.get("/api/dashboard-stats", dependencies=[Depends(require_user)])
+async def get_dashboard_stats():
     try:
         _require_database()
         # Mock views for now as requested
         views = 12543 
         
-        # Get counts
-        works = await asyncio.to_thread(count_records, "projects", status="live")
-        team = await asyncio.to_thread(count_records, "team_members", status="live")
-        products = await asyncio.to_thread(count_records, "products", status="live")
-        
+        breakdown = await _load_status_counts(DASHBOARD_TABLES)
+
         return {
             "views": views,
-            "works": works,
-            "team_members": team,
-            "products": products
+            "works": breakdown["projects"].get("live", 0),
+            "team_members": breakdown["team_members"].get("live", 0),
+            "products": breakdown["products"].get("live", 0),
+            "breakdown": breakdown,
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/storage/ensure")
-async def ensure_storage_bucket(request: Request):
-    get_user(request)
+@app.post("/api/storage/ensure", dependencies=[Depends(require_user)])
+async def ensure_storage_bucket():
     ensure_bucket_exists(CMS_BUCKET)
     return {"bucket": CMS_BUCKET, "status": "ok"}
 
 
-# --- Project (Works) Endpoints ---
+# --- List Helpers ---
+def _parse_list_fields(fields: Optional[str], model: type[BaseModel]) -> list[str] | None:
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    allowed = set(model.model_fields) | LIST_METADATA_FIELDS
+    unknown = [field for field in requested if field not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return requested or None
 
-@app.get("/api/projects")
-async def get_projects(status: Optional[str] = None):
+
+def _validate_cursor(after: Optional[str]) -> None:
+    if not after:
+        return
+    try:
+        decode_cursor(after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+
+def _list_cache_control(request: Request, status: Optional[str]) -> str:
+    # The admin UI re-reads these URLs right after writing, so browsers must revalidate by default.
+    # A longer lifetime is only ever sent for anonymous reads of the public live list.
+    if status == "live" and settings.cms_live_cache_control and "authorization" not in request.headers:
+        return settings.cms_live_cache_control
+    return settings.cms_cache_control
+
+
+async def _cached_json_response(
+    request: Request,
+    cache_key: tuple[Any, ...],
+    load: Callable[[], Awaitable[Any]],
+    *,
+    status: Optional[str] = None,
+) -> Response:
+    rendered = cms_cache.get(cache_key)
+    if rendered is None:
+        # A write that lands while load() runs invalidates the namespace; its stale result is then not stored.
+        generation = cms_cache.generation(cache_key[0])
+        rendered = render_json(await load())
+        cms_cache.set(cache_key, rendered, generation=generation)
+    return conditional_json_response(request, rendered, _list_cache_control(request, status))
+
+
+async def _list_cms_records(
+    request: Request,
+    table_name: str,
+    model: type[BaseModel],
+    *,
+    status: Optional[str],
+    limit: Optional[int],
+    after: Optional[str],
+    fields: Optional[str],
+) -> Response:
+    columns = _parse_list_fields(fields, model)
+    _validate_cursor(after)
+
+    async def load():
+        try:
+            _require_database()
+            # Without pagination params keep returning the plain list existing clients expect.
+            if limit is None and not after:
+                return await select_records(
+                    table_name,
+                    status=status,
+                    columns=columns,
+                    display_order_first="display_order" in await table_columns(table_name),
+                )
+            return await select_page(
+                table_name,
+                status=status,
+                columns=columns,
+                limit=limit or MAX_PAGE_SIZE,
+                after=after,
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    cache_key = (table_name, status, limit, after, tuple(columns or ()))
+    return await _cached_json_response(request, cache_key, load, status=status)
+
+
+# --- Batch Helpers ---
+def _batch_create_data(model: type[BaseModel], position: int, operation: BatchOperation) -> dict[str, Any]:
+    try:
+        data = model(**operation.data).dict(exclude_none=True)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=f"Operation {position}: {e}") from e
+    if "status" not in data:
+        data["status"] = "draft"
+    return data
+
+
+@lru_cache(maxsize=None)
+def _partial_model(model: type[BaseModel]) -> type[BaseModel]:
+    # Same field types as the model, but every field optional, so partial updates validate.
+    fields: dict[str, Any] = {name: (Optional[field.annotation], None) for name, field in model.model_fields.items()}
+    return create_model(f"{model.__name__}Update", **fields)
+
+
+def _batch_update_data(model: type[BaseModel], position: int, operation: BatchOperation) -> dict[str, Any]:
+    unknown = sorted(set(operation.data) - set(model.model_fields))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Operation {position}: unknown fields {', '.join(unknown)}")
+    try:
+        data = _partial_model(model)(**operation.data).dict(exclude_unset=True)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=f"Operation {position}: {e}") from e
+    return {key: value for key, value in data.items() if value is not None}
+
+
+def _require_operation_id(position: int, operation: BatchOperation) -> str:
+    if not operation.id:
+        raise HTTPException(status_code=400, detail=f"Operation {position}: {operation.op} requires an id")
+    return operation.id
+
+
+async def _apply_cms_batch(
+    table_name: str,
+    model: type[BaseModel],
+    payload: BatchRequest,
+) -> dict[str, Any]:
+    writes: list[RecordWrite] = []
+    for position, operation in enumerate(payload.operations):
+        if operation.op == "create":
+            writes.append(RecordWrite("insert", table_name, data=_batch_create_data(model, position, operation)))
+        elif operation.op == "update":
+            record_id = _require_operation_id(position, operation)
+            writes.append(
+                RecordWrite("update", table_name, record_id, _batch_update_data(model, position, operation))
+            )
+        else:
+            writes.append(RecordWrite("delete", table_name, _require_operation_id(position, operation)))
+
+    try:
+        _require_database()
+        results = await apply_writes(writes)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    cms_cache.invalidate(table_name)
+    return {"results": results}
+
+
+def _ordered_ids(payload: ReorderRequest) -> list[str]:
+    if not isinstance(payload.orderedIds, list):
+        raise HTTPException(status_code=400, detail="orderedIds array is required")
+    ordered_ids = [record_id for record_id in payload.orderedIds if isinstance(record_id, str) and record_id.strip()]
+    if not ordered_ids:
+        raise HTTPException(status_code=400, detail="orderedIds must include at least one id")
+    if len(ordered_ids) > MAX_BATCH_OPERATIONS:
+        raise HTTPException(status_code=400, detail=f"orderedIds can include at most {MAX_BATCH_OPERATIONS} ids")
+    return ordered_ids
+
+
+async def _apply_cms_reorder(table_name: str, payload: ReorderRequest) -> dict[str, Any]:
+    writes = [
+        RecordWrite("update", table_name, record_id, {"display_order": position})
+        for position, record_id in enumerate(_ordered_ids(payload))
+    ]
     try:
         _require_database()
-        return await asyncio.to_thread(select_records, "projects", status=status)
+        await apply_writes(writes)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    cms_cache.invalidate(table_name)
+    return {"success": True}
+
+
+# --- Project (Works) Endpoints ---
+
+@app.get("/api/projects")
+async def get_projects(
+    request: Request,
+    status: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    return await _list_cms_records(
+        request, "projects", Project, status=status, limit=limit, after=after, fields=fields
+    )
 
-@app.post("/api/projects")
-async def create_project(project: Project, request: Request):
-    get_user(request)
+@app.post("/api/projects", dependencies=[Depends(require_user)])
+async def create_project(project: Project):
     try:
         _require_database()
         data = project.dict(exclude_none=True)
@@ -1236,204 +1699,247 @@ async def create_project(project: Project, request: Request):
         if "status" not in data:
             data["status"] = "draft"
             
-        return await asyncio.to_thread(insert_record, "projects", data)
+        rows = await insert_record("projects", data)
+        cms_cache.invalidate("projects")
+        return rows
     except Exception as e:
         print(f"Error creating project: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.patch("/api/projects/{project_id}")
-async def update_project(project_id: str, project: Project, request: Request):
-    get_user(request)
+# Declared before /{project_id} so "reorder" is not captured as an id; the same holds for each collection.
+@app.patch("/api/projects/reorder", dependencies=[Depends(require_user)])
+async def reorder_projects(payload: ReorderRequest):
+    return await _apply_cms_reorder("projects", payload)
+
+@app.patch("/api/projects/{project_id}", dependencies=[Depends(require_user)])
+async def update_project(project_id: str, project: Project):
     try:
         _require_database()
         data = project.dict(exclude_none=True)
-        return await asyncio.to_thread(update_record_by_id, "projects", project_id, data)
+        rows = await update_record_by_id("projects", project_id, data)
+        cms_cache.invalidate("projects")
+        return rows
     except Exception as e:
          raise HTTPException(status_code=500, detail=str(e))
 
-@app.delete("/api/projects/{project_id}")
-async def delete_project(project_id: str, request: Request):
-    get_user(request)
+@app.delete("/api/projects/{project_id}", dependencies=[Depends(require_user)])
+async def delete_project(project_id: str):
     try:
         _require_database()
-        return await asyncio.to_thread(delete_record_by_id, "projects", project_id)
+        rows = await delete_record_by_id("projects", project_id)
+        cms_cache.invalidate("projects")
+        return rows
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/projects/batch", dependencies=[Depends(require_user)])
+async def batch_projects(payload: BatchRequest):
+    return await _apply_cms_batch("projects", Project, payload)
+
 # --- Products Endpoints ---
 
 @app.get("/api/products")
-async def get_products(status: Optional[str] = None):
-    try:
-        _require_database()
-        return await asyncio.to_thread(select_records, "products", status=status)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+async def get_products(
+    request: Request,
+    status: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    return await _list_cms_records(
+        request, "products", Product, status=status, limit=limit, after=after, fields=fields
+    )
 
-@app.post("/api/products")
-async def create_product(product: Product, request: Request):
-    get_user(request)
+@app.post("/api/products", dependencies=[Depends(require_user)])
+async def create_product(product: Product):
     try:
         _require_database()
         data = product.dict(exclude_none=True)
         if "status" not in data:
             data["status"] = "draft"
-        return await asyncio.to_thread(insert_record, "products", data)
+        rows = await insert_record("products", data)
+        cms_cache.invalidate("products")
+        return rows
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.patch("/api/products/{product_id}")
-async def update_product(product_id: str, product: Product, request: Request):
-    get_user(request)
+@app.patch("/api/products/reorder", dependencies=[Depends(require_user)])
+async def reorder_products(payload: ReorderRequest):
+    return await _apply_cms_reorder("products", payload)
+
+@app.patch("/api/products/{product_id}", dependencies=[Depends(require_user)])
+async def update_product(product_id: str, product: Product):
     try:
         _require_database()
         data = product.dict(exclude_none=True)
-        return await asyncio.to_thread(update_record_by_id, "products", product_id, data)
+        rows = await update_record_by_id("products", product_id, data)
+        cms_cache.invalidate("products")
+        return rows
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.delete("/api/products/{product_id}")
-async def delete_product(product_id: str, request: Request):
-    get_user(request)
+@app.delete("/api/products/{product_id}", dependencies=[Depends(require_user)])
+async def delete_product(product_id: str):
     try:
         _require_database()
-        return await asyncio.to_thread(delete_record_by_id, "products", product_id)
+        rows = await delete_record_by_id("products", product_id)
+        cms_cache.invalidate("products")
+        return rows
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/products/batch", dependencies=[Depends(require_user)])
+async def batch_products(payload: BatchRequest):
+    return await _apply_cms_batch("products", Product, payload)
+
 # --- Team Members Endpoints ---
 
 @app.get("/api/team")
-async def get_team(status: Optional[str] = None):
-    try:
-        _require_database()
-        return await asyncio.to_thread(select_records, "team_members", status=status)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+async def get_team(
+    request: Request,
+    status: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    return await _list_cms_records(
+        request, "team_members", TeamMember, status=status, limit=limit, after=after, fields=fields
+    )
 
-@app.post("/api/team")
-async def create_team_member(member: TeamMember, request: Request):
-    get_user(request)
+@app.post("/api/team", dependencies=[Depends(require_user)])
+async def create_team_member(member: TeamMember):
     try:
         _require_database()
         data = member.dict(exclude_none=True)
         if "status" not in data:
             data["status"] = "draft"
-        return await asyncio.to_thread(insert_record, "team_members", data)
+        rows = await insert_record("team_members", data)
+        cms_cache.invalidate("team_members")
+        return rows
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.patch("/api/team/{member_id}")
-async def update_team_member(member_id: str, member: TeamMember, request: Request):
-    get_user(request)
+@app.patch("/api/team/reorder", dependencies=[Depends(require_user)])
+async def reorder_team_members(payload: ReorderRequest):
+    return await _apply_cms_reorder("team_members", payload)
+
+@app.patch("/api/team/{member_id}", dependencies=[Depends(require_user)])
+async def update_team_member(member_id: str, member: TeamMember):
     try:
         _require_database()
         data = member.dict(exclude_none=True)
-        return await asyncio.to_thread(update_record_by_id, "team_members", member_id, data)
+        rows = await update_record_by_id("team_members", member_id, data)
+        cms_cache.invalidate("team_members")
+        return rows
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.delete("/api/team/{member_id}")
-async def delete_team_member(member_id: str, request: Request):
-    get_user(request)
+@app.delete("/api/team/{member_id}", dependencies=[Depends(require_user)])
+async def delete_team_member(member_id: str):
     try:
         _require_database()
-        return await asyncio.to_thread(delete_record_by_id, "team_members", member_id)
+        rows = await delete_record_by_id("team_members", member_id)
+        cms_cache.invalidate("team_members")
+        return rows
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/team/batch", dependencies=[Depends(require_user)])
+async def batch_team_members(payload: BatchRequest):
+    return await _apply_cms_batch("team_members", TeamMember, payload)
+
 
 # --- Reviews Endpoints ---
 
 # --- Reviews Endpoints ---
 
 @app.get("/api/reviews")
-async def get_reviews(status: Optional[str] = None):
-    try:
+async def get_reviews(
+    request: Request,
+    status: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+):
+    _validate_cursor(after)
+
+    async def load():
         _require_database()
-        data: list[dict[str, Any]] = []
-
-        if await asyncio.to_thread(table_exists, "reviews"):
-            try:
-                data.extend(await asyncio.to_thread(select_records, "reviews", status=status))
-            except Exception:
-                pass
-
-        if await asyncio.to_thread(table_exists, "testimonials"):
-            testimonials = await asyncio.to_thread(select_records, "testimonials", status=None)
-            for t in testimonials:
-                is_live = _is_live_review_row(t)
-
-                if status == "live" and not is_live:
-                    continue
-                if status == "draft" and is_live:
-                    continue
-
-                data.append(_map_testimonial_to_review(t))
-
-        data.sort(key=lambda x: x.get("created_at") or "", reverse=True)
-        return data
+        if limit is None and not after:
+            return await select_reviews_feed(status=status)
+        return await select_reviews_page(status=status, limit=limit or MAX_PAGE_SIZE, after=after)
 
+    try:
+        return await _cached_json_response(request, ("reviews", status, limit, after), load, status=status)
     except Exception as e:
         print(f"Error fetching reviews: {e}")
         return []
 
-@app.post("/api/reviews")
-async def create_review(review: Review, request: Request):
-    get_user(request)
+@app.post("/api/reviews", dependencies=[Depends(require_user)])
+async def create_review(review: Review):
     try:
         _require_database()
         data = review.dict(exclude_none=True)
         if "status" not in data:
             data["status"] = "draft"
 
-        if await asyncio.to_thread(table_exists, "reviews"):
-            try:
-                return await asyncio.to_thread(insert_record, "reviews", data)
-            except Exception:
-                pass
+        schema = await get_schema()
+        choice = _choose_review_insert(data, schema.columns("reviews"), schema.columns("testimonials"))
+        if choice is None:
+            raise Exception("No reviews or testimonials table is available")
 
-        last_error: Exception | None = None
-        for payload in _build_testimonial_insert_variants(data):
-            try:
-                response_fallback = await asyncio.to_thread(insert_record, "testimonials", payload)
-                if response_fallback:
-                    return [_map_testimonial_to_review(response_fallback[0])]
-                return response_fallback
-            except Exception as e:
-                last_error = e
-
-        raise last_error if last_error else Exception("Failed to insert review")
+        table, payload = choice
+        try:
+            rows = await insert_record(table, payload)
+        except Exception:
+            # The cached schema may be stale; reload it before the next write.
+            invalidate_schema()
+            raise
+        if table == "testimonials" and rows:
+            return [_map_testimonial_to_review(rows[0])]
+        return rows
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        cms_cache.invalidate("reviews")
 
-@app.patch("/api/reviews/{review_id}")
-async def update_review(review_id: str, review: Review, request: Request):
-    get_user(request)
+@app.patch("/api/reviews/reorder", dependencies=[Depends(require_user)])
+async def reorder_reviews(payload: ReorderRequest):
+    ordered_ids = _ordered_ids(payload)
+    try:
+        _require_database()
+        schema = await get_schema()
+        located = await _locate_reviews(set(ordered_ids), schema)
+        writes = [
+            RecordWrite("update", located[record_id], record_id, {"display_order": position})
+            for position, record_id in enumerate(ordered_ids)
+            if record_id in located and "display_order" in schema.columns(located[record_id])
+        ]
+        await apply_writes(writes)
+        return {"success": True}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        cms_cache.invalidate("reviews")
+
+@app.patch("/api/reviews/{review_id}", dependencies=[Depends(require_user)])
+async def update_review(review_id: str, review: Review):
     try:
         _require_database()
         data = review.dict(exclude_none=True)
         
-        if await asyncio.to_thread(table_exists, "reviews"):
+        if await table_exists("reviews"):
             try:
-                response = await asyncio.to_thread(update_record_by_id, "reviews", review_id, data)
+                response = await update_record_by_id("reviews", review_id, data)
                 if response:
                     return response
             except Exception:
                 pass
 
-        existing_row = None
-        if await asyncio.to_thread(table_exists, "testimonials"):
-            existing_row = await asyncio.to_thread(
-                fetch_one,
-                "select * from public.testimonials where id = %s limit 1",
-                (review_id,),
-            )
-
-        if existing_row:
-            t_data = _build_testimonial_update_data(data, existing_row)
+        testimonial_columns = await table_columns("testimonials")
+        if testimonial_columns:
+            t_data = _build_testimonial_update_data(data, testimonial_columns)
             if t_data:
-                response_t = await asyncio.to_thread(update_record_by_id, "testimonials", review_id, t_data)
+                response_t = await update_record_by_id("testimonials", review_id, t_data)
                 if response_t:
                     return [_map_testimonial_to_review(response_t[0])]
 
@@ -1441,22 +1947,23 @@ async def update_review(review_id: str, review: Review, request: Request):
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        cms_cache.invalidate("reviews")
 
-@app.delete("/api/reviews/{review_id}")
-async def delete_review(review_id: str, request: Request):
-    get_user(request)
+@app.delete("/api/reviews/{review_id}", dependencies=[Depends(require_user)])
+async def delete_review(review_id: str):
     try:
         _require_database()
-        if await asyncio.to_thread(table_exists, "reviews"):
+        if await table_exists("reviews"):
             try:
-                response = await asyncio.to_thread(delete_record_by_id, "reviews", review_id)
+                response = await delete_record_by_id("reviews", review_id)
                 if response:
                     return response
             except Exception:
                 pass
 
-        if await asyncio.to_thread(table_exists, "testimonials"):
-            response_t = await asyncio.to_thread(delete_record_by_id, "testimonials", review_id)
+        if await table_exists("testimonials"):
+            response_t = await delete_record_by_id("testimonials", review_id)
             if response_t:
                  return [{
                         "status": "deleted",
@@ -1466,4 +1973,83 @@ async def delete_review(review_id: str, request: Request):
         return []
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        cms_cache.invalidate("reviews")
+
+
+async def _locate_reviews(ids: Collection[str], schema: SchemaSnapshot) -> dict[str, str]:
+    # Like the single-row endpoints, an id present in both tables resolves to reviews.
+    tables = [table for table in ("testimonials", "reviews") if schema.has_table(table)]
+    if not ids or not tables:
+        return {}
+    query = " union all ".join(
+        f"select '{table}' as table_name, id::text as id from public.{table} where id::text = any(%s)"
+        for table in tables
+    )
+    rows = await fetch_all(query, [list(ids)] * len(tables))
+    return {row["id"]: row["table_name"] for row in rows}
+
+
+def _review_write(
+    position: int,
+    operation: BatchOperation,
+    located: dict[str, str],
+    schema: SchemaSnapshot,
+) -> RecordWrite | None:
+    if operation.op == "create":
+        data = _batch_create_data(Review, position, operation)
+        choice = _choose_review_insert(data, schema.columns("reviews"), schema.columns("testimonials"))
+        if choice is None:
+            raise HTTPException(status_code=500, detail="No reviews or testimonials table is available")
+        return RecordWrite("insert", choice[0], data=choice[1])
+
+    record_id = _require_operation_id(position, operation)
+    table = located.get(record_id)
+    if table is None:
+        return None
+    if operation.op == "delete":
+        return RecordWrite("delete", table, record_id)
+
+    data = _batch_update_data(Review, position, operation)
+    if table == "testimonials":
+        data = _build_testimonial_update_data(data, schema.columns("testimonials"))
+    else:
+        data = {key: value for key, value in data.items() if key in schema.columns("reviews")}
+    return RecordWrite("update", table, record_id, data)
+
+
+async def _apply_review_writes(writes: list[RecordWrite | None]) -> list[list[dict[str, Any]]]:
+    results = iter(await apply_writes([write for write in writes if write is not None]))
+    merged: list[list[dict[str, Any]]] = []
+    for write in writes:
+        if write is None:
+            merged.append([])
+            continue
+        rows = next(results)
+        if write.table_name == "testimonials":
+            rows = [_map_testimonial_to_review(row) for row in rows]
+        merged.append(rows)
+    return merged
+
+
+@app.post("/api/reviews/batch", dependencies=[Depends(require_user)])
+async def batch_reviews(payload: BatchRequest):
+    try:
+        _require_database()
+        schema = await get_schema()
+        located = await _locate_reviews(
+            {operation.id for operation in payload.operations if operation.op != "create" and operation.id},
+            schema,
+        )
+        writes = [
+            _review_write(position, operation, located, schema)
+            for position, operation in enumerate(payload.operations)
+        ]
+        return {"results": await _apply_review_writes(writes)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        cms_cache.invalidate("reviews")
 
@@ -0,0 +1,24 @@
+-- Content-addressed media index used by the FastAPI upload service when MEDIA_DEDUPLICATE=true.
+
+CREATE TABLE IF NOT EXISTS public.media_blobs (
+  bucket TEXT NOT NULL,
+  blob_path TEXT NOT NULL,
+  sha256 TEXT NOT NULL,
+  size_bytes BIGINT NOT NULL,
+  ref_count INTEGER NOT NULL DEFAULT 0,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (bucket, blob_path)
+);
+
+CREATE INDEX IF NOT EXISTS media_blobs_sha256_idx
+  ON public.media_blobs (sha256);
+
+CREATE TABLE IF NOT EXISTS public.media_objects (
+  bucket TEXT NOT NULL,
+  object_path TEXT NOT NULL,
+  blob_path TEXT NOT NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (bucket, object_path),
+  FOREIGN KEY (bucket, blob_path) REFERENCES public.media_blobs (bucket, blob_path)
+);
@@ -0,0 +1,22 @@
+-- Durable queue for outgoing email, drained by the FastAPI outbox worker.
+
+CREATE TABLE IF NOT EXISTS public.email_outbox (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  transport TEXT NOT NULL,
+  payload JSONB NOT NULL,
+  status TEXT NOT NULL DEFAULT 'pending',
+  attempts INTEGER NOT NULL DEFAULT 0,
+  max_attempts INTEGER NOT NULL,
+  next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  locked_at TIMESTAMPTZ,
+  last_error TEXT,
+  dedupe_key TEXT UNIQUE,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  sent_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS email_outbox_due_idx
+  ON public.email_outbox (status, next_attempt_at);
+
+ALTER TABLE public.email_outbox ENABLE ROW LEVEL SECURITY;